@@ -0,0 +1,36 @@
+"""
+Run many solver cases side by side on a thread pool.
+
+The property layer keeps one CoolProp state per thread and fluid, so the
+exchanger solvers can be called from several threads at once. Threads
+avoid the pickling and start-up cost of a process pool; the time spent
+inside CoolProp's C++ code is where they overlap. Each case runs in a copy
+of the caller's context, so a surrounding use_backend() applies to it.
+"""
+
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _call(solver, case):
+    if isinstance(case, dict):
+        return solver(**case)
+    return solver(*case)
+
+
+def run_batch(solver, cases, max_workers=None):
+    """Call solver once per case and return the results in the same order.
+
+    Each case is a tuple of positional arguments or a dict of keyword
+    arguments. The first exception raised by a case is re-raised.
+    """
+    cases = list(cases)
+    if max_workers is None:
+        max_workers = min(len(cases), os.cpu_count() or 1) or 1
+    if max_workers == 1:
+        return [_call(solver, case) for case in cases]
+
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda case: context.copy().run(_call, solver, case), cases))
@@ -1,5 +1,6 @@
 import numpy as np
-from CoolProp.CoolProp import PropsSI
+from solvers.properties import fluid_props, solver_scope
+from solvers.saturation import saturation_curve
 
 # Conversion Factors
 PA_TO_KPA = 0.001
@@ -34,7 +35,8 @@ def vertical_plate_lw(inputs, unit_system):
         length_m = length_input * 0.3048
 
     # Get pressure corresponding to Tsat
-    tsat_k = PropsSI('T', 'P', pressure_pa, 'Q', 0, 'Water')
+    sat = saturation_curve('Water').at_P(pressure_pa)
+    tsat_k = sat.T
     print(tsat_k)
 
     # Calculate film temperature
@@ -42,16 +44,15 @@ def vertical_plate_lw(inputs, unit_system):
 
     # Get property values using CoolProp
     # Liquid properties at film temperature
-    rhol = PropsSI('D', 'T', tfilm_k, 'P', pressure_pa, 'Water')    # Density
-    k = PropsSI('L', 'T', tfilm_k, 'P', pressure_pa, 'Water')       # Thermal Conductivity
-    cp = PropsSI('Cpmass', 'T', tfilm_k, 'P', pressure_pa, 'Water') # Specific Heat
-    mu = PropsSI('V', 'T', tfilm_k, 'P', pressure_pa, 'Water')      # Dynamic Viscosity
+    film = fluid_props('Water', tfilm_k, pressure_pa)
+    rhol = film.rho     # Density
+    k = film.k          # Thermal Conductivity
+    cp = film.cp        # Specific Heat
+    mu = film.mu        # Dynamic Viscosity
 
     # Saturated properties at Tsat
-    hf = PropsSI('Hmass', 'T', tsat_k, 'Q', 0, 'Water')         # Enthalpy sat liq
-    hg = PropsSI('Hmass', 'T', tsat_k, 'Q', 1, 'Water')         # Enthalpy sat gas
-    hfg = hg - hf                                                                    # Latent heat
-    pr = PropsSI('Prandtl', 'T', tsat_k, 'Q', 0, 'Water')       # Prandtl Number
+    hfg = sat.hfg       # Latent heat
+    pr = sat.pr_l       # Prandtl Number
 
     nu = mu / rhol                  # Kinematic Viscosity
     del_t = tsat_k - tsurf_k        # Temperature Difference
@@ -105,22 +106,22 @@ def vertical_plate_h(inputs, unit_system):
         height_m = height_input * 0.3048
 
     # Get saturation temperature
-    tsat_k = PropsSI('T', 'P', pressure_pa, 'Q', 0, 'Water')
+    sat = saturation_curve('Water').at_P(pressure_pa)
+    tsat_k = sat.T
 
     tfilm_k = (tsat_k + tsurf_k) / 2
 
     # Get property values
     # Liquid properties at film temperature
-    rhol = PropsSI('D', 'T', tfilm_k, 'P', pressure_pa, 'Water')
-    k = PropsSI('L', 'T', tfilm_k, 'P', pressure_pa, 'Water')
-    cp = PropsSI('Cpmass', 'T', tfilm_k, 'P', pressure_pa, 'Water')
-    mu = PropsSI('V', 'T', tfilm_k, 'P', pressure_pa, 'Water')
+    film = fluid_props('Water', tfilm_k, pressure_pa)
+    rhol = film.rho
+    k = film.k
+    cp = film.cp
+    mu = film.mu
 
     # Saturated properties at saturated temperature
-    hf = PropsSI('Hmass', 'T', tsat_k, 'Q', 0, 'Water')
-    hg = PropsSI('Hmass', 'T', tsat_k, 'Q', 1, 'Water')
-    hfg = hg - hf
-    pr = PropsSI('Prandtl', 'T', tsat_k, 'Q', 0, 'Water')
+    hfg = sat.hfg
+    pr = sat.pr_l
 
     nu = mu / rhol
     del_t = tsat_k - tsurf_k
@@ -176,22 +177,22 @@ def horizontal_tube_od(inputs, unit_system):
         outer_diameter_m = outer_diameter_input * 0.3048
 
     # Get saturation temperature
-    tsat_k = PropsSI('T', 'P', pressure_pa, 'Q', 0, 'Water')
+    sat = saturation_curve('Water').at_P(pressure_pa)
+    tsat_k = sat.T
 
     tfilm_k = (tsat_k + tsurf_k) / 2
 
     # Get property values
     # Liquid properties at film temperature
-    rhol = PropsSI('D', 'T', tfilm_k, 'P', pressure_pa, 'Water')
-    k = PropsSI('L', 'T', tfilm_k, 'P', pressure_pa, 'Water')
-    cp = PropsSI('Cpmass', 'T', tfilm_k, 'P', pressure_pa, 'Water')
-    mu = PropsSI('V', 'T', tfilm_k, 'P', pressure_pa, 'Water')
+    film = fluid_props('Water', tfilm_k, pressure_pa)
+    rhol = film.rho
+    k = film.k
+    cp = film.cp
+    mu = film.mu
 
     # Saturated properties at saturated temperature
-    hf = PropsSI('Hmass', 'T', tsat_k, 'Q', 0, 'Water')
-    hg = PropsSI('Hmass', 'T', tsat_k, 'Q', 1, 'Water')
-    hfg = hg - hf
-    rhov = PropsSI('D', 'T', tsat_k, 'Q', 1, 'Water')
+    hfg = sat.hfg
+    rhov = sat.rho_v
 
     delt = tsat_k - tsurf_k
 
@@ -248,11 +249,10 @@ def horizontal_tube_od_id(inputs, unit_system):
         h_o = outside_coeff_input * BTU_HR_FT2_F_TO_W_M2_K
         h_i = inside_coeff_input * BTU_HR_FT2_F_TO_W_M2_K
 
-    tsat_k = PropsSI('T', 'P', pressure_pa, 'Q', 0, 'Water')
+    sat = saturation_curve('Water').at_P(pressure_pa)
+    tsat_k = sat.T
 
-    hf = PropsSI('Hmass', 'T', tsat_k, 'Q', 0, 'Water')
-    hg = PropsSI('Hmass', 'T', tsat_k, 'Q', 1, 'Water')
-    hfg = hg - hf
+    hfg = sat.hfg
 
     delt = tsat_k - tmean_k
 
@@ -307,19 +307,18 @@ def circular_heating_element(inputs, unit_system):
         diameter_m = diameter_input * 0.3048
 
     # Get saturation temperature
-    tsat_k = PropsSI('T', 'P', pressure_pa, 'Q', 0, 'Water')
+    sat = saturation_curve('Water').at_P(pressure_pa)
+    tsat_k = sat.T
 
     # Get water properties
-    hf = PropsSI('Hmass', 'T', tsat_k, 'Q', 0, 'Water')
-    hg = PropsSI('Hmass', 'T', tsat_k, 'Q', 1, 'Water')
-    hfg = hg - hf
+    hfg = sat.hfg
 
-    sigma = PropsSI('I', 'T', tsat_k, 'Q', 0, 'Water')
-    rhol = PropsSI('D', 'T', tsat_k, 'Q', 0, 'Water')
-    mu = PropsSI('V', 'T', tsat_k, 'Q', 0, 'Water')
-    cp = PropsSI('Cpmass', 'T', tsat_k, 'Q', 0, 'Water')
-    rhov = PropsSI('D', 'T', tsat_k, 'Q', 1, 'Water')
-    pr = PropsSI('Prandtl', 'T', tsat_k, 'Q', 0, 'Water')
+    sigma = sat.sigma
+    rhol = sat.rho_l
+    mu = sat.mu_l
+    cp = sat.cp_l
+    rhov = sat.rho_v
+    pr = sat.pr_l
 
     # Calculate temperature difference
     delt = tsurf_k - tsat_k
@@ -356,6 +355,7 @@ def circular_heating_element(inputs, unit_system):
     }
     return results
 
+@solver_scope
 def calculate_boilcond(problem_type, inputs, unit_system):
     if problem_type == "Vertical Plate (L & W)":
         return vertical_plate_lw(inputs, unit_system)
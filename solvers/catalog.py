@@ -0,0 +1,500 @@
+"""
+Pipe, tube, shell and fluid catalogs.
+
+The CSV tables under tables/ are read once, the first time any lookup is
+made. Each one becomes a dict keyed the way the solvers query it:
+
+    steel pipe       (nominal size, schedule)               e.g. (1.5, "40 (std)")
+    copper tubing    (nominal size, type)                   e.g. (0.75, "L")
+    tubes            (tube OD, BWG)
+    shell counts     (tube OD, pitch, layout, shell ID)
+    fluid constants  fluid name
+
+Sizes may be given as numbers or as strings such as "0.75", "15/16" or
+"1 1/4". All dimensions are returned as plain floats in SI units (m, m^2).
+
+The tables are parsed with the standard csv module, so importing the
+solvers does not import pandas. pandas is only needed for
+Catalog.to_dataframes().
+
+The parsed tables, including the saturated water table used by
+WaterInterp, are compiled into one uncompressed .npz artifact. It is kept
+as catalog.npz in the same user cache directory as the property tables
+(~/.cache/thermal-solver, or THERMAL_SOLVER_CACHE), so the package tree is
+never written to; THERMAL_SOLVER_CATALOG overrides the path. The artifact
+stores the SHA-256 of every source CSV. Cold starts memory-map its arrays
+instead of parsing the CSVs. If any CSV no longer matches its stored hash,
+the artifact is rebuilt automatically. To build it ahead of time run
+
+    python -m solvers.catalog
+"""
+
+import csv
+import hashlib
+import os
+import struct
+import zipfile
+from bisect import bisect_left, bisect_right
+from fractions import Fraction
+from pathlib import Path
+from typing import NamedTuple
+import numpy as np
+
+BASE_PATH = Path(__file__).parent.parent
+TABLES_PATH = BASE_PATH / "tables"
+PIPE_DIMENSIONS_PATH = TABLES_PATH / "pipe_dimensions.csv"
+COPPER_TUBING_PATH = TABLES_PATH / "seamless_copper_tubing.csv"
+TUBE_DIMENSIONS_PATH = TABLES_PATH / "tubedimensions.csv"
+SHELL_TUBE_COUNT_PATH = TABLES_PATH / "shelltubecounts.csv"
+FLUID_PROPERTIES_PATH = TABLES_PATH / "fluidpropertiesdensityvisc.csv"
+WATER_PROPERTIES_PATH = TABLES_PATH / "waterproperties.csv"
+
+# Source tables compiled into the artifact, in the order their hashes are stored
+SOURCE_PATHS = (PIPE_DIMENSIONS_PATH, COPPER_TUBING_PATH, TUBE_DIMENSIONS_PATH,
+                SHELL_TUBE_COUNT_PATH, FLUID_PROPERTIES_PATH, WATER_PROPERTIES_PATH)
+
+# User cache directory, shared with solvers.property_tables
+CACHE_DIR = Path(os.environ.get("THERMAL_SOLVER_CACHE", Path.home() / ".cache" / "thermal-solver"))
+CATALOG_PATH = Path(os.environ.get("THERMAL_SOLVER_CATALOG", CACHE_DIR / "catalog.npz"))
+CATALOG_VERSION = 1
+
+# Conversion Factors
+IN_TO_M = 0.0254
+CM_TO_M = 0.01
+CM2_TO_M2 = 1e-4
+
+# Tube passes listed in shelltubecounts.csv
+TUBE_PASSES = (1, 2, 4, 6, 8)
+
+
+class PipeDimensions(NamedTuple):
+    """Steel pipe or copper tube size, in SI units."""
+    nominal: str        # Nominal size as listed, e.g. "1 1/2"
+    schedule: str       # Steel schedule, e.g. "40 (std)", or copper type "K", "L", "M"
+    od: float           # Outside diameter, m
+    id: float           # Inside diameter, m
+    flow_area: float    # Flow area, m^2
+
+
+class PipeSizes(NamedTuple):
+    """Arrays of pipe or tube sizes, one entry per catalog row, sorted by inside diameter (SI)."""
+    nominal: np.ndarray     # Nominal sizes as listed
+    schedule: np.ndarray    # Steel schedules or copper types
+    od: np.ndarray          # Outside diameters, m
+    id: np.ndarray          # Inside diameters, m
+    flow_area: np.ndarray   # Flow areas, m^2
+
+
+class TubeDimensions(NamedTuple):
+    """Heat-exchanger tube size, in SI units."""
+    od: float           # Outside diameter, m
+    bwg: int            # Birmingham wire gauge
+    id: float           # Inside diameter, m
+
+
+class ShellLayout(NamedTuple):
+    """Tube counts of one shell for a tube OD, pitch and layout, in SI units."""
+    tube_od: float      # Tube outside diameter, m
+    pitch: float        # Tube pitch, m
+    layout: str         # "square" or "triangular"
+    shell_id: float     # Shell inside diameter, m
+    tube_counts: dict   # passes -> number of tubes (missing entries are omitted)
+
+
+class FluidConstants(NamedTuple):
+    """Constant-property fluid data, in SI units."""
+    fluid: str
+    rho: float          # Density, kg/m^3
+    mu: float           # Dynamic viscosity, Pa-s
+    nu: float           # Kinematic viscosity, m^2/s
+
+
+def parse_inches(value):
+    """Parse a size in inches such as 0.75, "0.75", "15/16" or "1 1/4"."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(sum(Fraction(part) for part in str(value).split()))
+    except (ValueError, ZeroDivisionError):
+        raise ValueError(f"Invalid size in inches: '{value}'")
+
+
+def _size_key(inches):
+    # Round so that 1, "1", "1.00" and 1.0000000001 share one key
+    return round(parse_inches(inches), 6)
+
+
+def _layout_key(tube_od, pitch, layout, shell_id):
+    if layout is None:
+        raise ValueError("Arrangement cannot be None")
+    return (_size_key(tube_od), _size_key(pitch), str(layout).lower(), _size_key(shell_id))
+
+
+def _copper_type(ptype):
+    # The GUI passes "Type L"; the table lists just "L"
+    if not ptype:
+        raise ValueError("Copper pipe type (K, L, M) must be selected.")
+    return str(ptype).split(" ")[-1]
+
+
+def _read_rows(path):
+    # utf-8-sig strips the byte-order mark some of the tables were saved with
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+
+def source_hashes():
+    """SHA-256 of every source CSV, in SOURCE_PATHS order."""
+    return [hashlib.sha256(path.read_bytes()).hexdigest() for path in SOURCE_PATHS]
+
+
+def compile_tables():
+    """Parse the source CSVs into a dict of NumPy arrays (SI units)."""
+    arrays = {"version": np.array(CATALOG_VERSION), "hashes": np.array(source_hashes())}
+
+    for prefix, path, size_column, schedule_column in (
+            ("steel", PIPE_DIMENSIONS_PATH, "Nominal Diameter in", "Schedule"),
+            ("copper", COPPER_TUBING_PATH, "Standard Size in", "Type")):
+        rows = _read_rows(path)
+        arrays[f"{prefix}_nominal"] = np.array([row[size_column] for row in rows])
+        arrays[f"{prefix}_schedule"] = np.array([row[schedule_column] for row in rows])
+        arrays[f"{prefix}_dims"] = np.array([(float(row["Outside Diameter in"]) * IN_TO_M,
+                                              float(row["Inside Diameter cm"]) * CM_TO_M,
+                                              float(row["Flow Area cm^2"]) * CM2_TO_M2) for row in rows])
+
+    rows = _read_rows(TUBE_DIMENSIONS_PATH)
+    arrays["tube_od_in"] = np.array([parse_inches(row["tube_od_in"]) for row in rows])
+    arrays["tube_bwg"] = np.array([int(row["bwg"]) for row in rows])
+    arrays["tube_id_in"] = np.array([parse_inches(row["tube_id_in"]) for row in rows])
+
+    # Sizes in inches; missing tube counts are stored as -1
+    rows = _read_rows(SHELL_TUBE_COUNT_PATH)
+    arrays["shell_sizes_in"] = np.array([(parse_inches(row["tube_od_in"]), parse_inches(row["pitch_in"]),
+                                          parse_inches(row["shell_id_in"])) for row in rows])
+    arrays["shell_layout"] = np.array([row["pitch_layout"].lower() for row in rows])
+    arrays["shell_counts"] = np.array([[int(row[f"{passes}_pass"]) if row[f"{passes}_pass"].strip() else -1
+                                        for passes in TUBE_PASSES] for row in rows])
+
+    rows = _read_rows(FLUID_PROPERTIES_PATH)
+    arrays["fluid_names"] = np.array([row["Substance"] for row in rows])
+    arrays["fluid_values"] = np.array([(float(row["Density (kg/m³)"]), float(row["Dynamic Viscosity (Pa·s)"]),
+                                        float(row["Kinematic Viscosity (m²/s)"])) for row in rows])
+
+    with open(WATER_PROPERTIES_PATH, encoding="utf-8-sig") as f:
+        arrays["water_columns"] = np.array(f.readline().strip().split(","))
+    arrays["water_table"] = np.loadtxt(WATER_PROPERTIES_PATH, delimiter=",", skiprows=1, encoding="utf-8-sig")
+    return arrays
+
+
+def save_artifact(arrays, path=None):
+    """Write compiled tables as an uncompressed .npz so the arrays can be memory-mapped."""
+    path = Path(path) if path is not None else CATALOG_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temporary file first so a concurrent reader never sees half an artifact
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+    finally:
+        # Only left behind if the write or the rename failed
+        tmp_path.unlink(missing_ok=True)
+
+
+def load_artifact(path=None):
+    """Memory-map the arrays of a compiled artifact.
+
+    Raises ValueError if the artifact is from another version or a source
+    CSV has changed since it was built.
+    """
+    path = Path(path) if path is not None else CATALOG_PATH
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"Compressed catalog artifact cannot be memory-mapped: {path}")
+            # Skip the zip local header to reach the .npy data
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack("<HH", f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            if dtype.hasobject:
+                raise ValueError(f"Catalog artifact holds object arrays: {path}")
+
+            name = info.filename[:-len(".npy")]
+            if not shape or 0 in shape:
+                arrays[name] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                                         order="F" if fortran_order else "C")
+
+    if int(arrays["version"]) != CATALOG_VERSION or list(arrays["hashes"]) != source_hashes():
+        raise ValueError(f"Stale catalog artifact: {path}")
+    return arrays
+
+
+def build_artifact(path=None):
+    """Compile the CSV tables and write the artifact; returns the compiled arrays."""
+    arrays = compile_tables()
+    save_artifact(arrays, path)
+    return arrays
+
+
+class ShellCountIndex:
+    """Shells of one (tube OD, pitch, layout, passes) group, sorted for bisect queries."""
+
+    def __init__(self, shells, passes):
+        shells = sorted(shells, key=lambda shell: shell.shell_id)
+        self.shells = shells
+        self.counts = [shell.tube_counts[passes] for shell in shells]
+
+        # Running maximum of the counts in shell-ID order: the first shell whose
+        # running maximum reaches N is the smallest shell holding N tubes
+        self.running_max = []
+        largest = 0
+        for count in self.counts:
+            largest = max(largest, count)
+            self.running_max.append(largest)
+
+        by_count = sorted(range(len(shells)), key=lambda i: (self.counts[i], shells[i].shell_id))
+        self.sorted_counts = [self.counts[i] for i in by_count]
+        self.shells_by_count = [shells[i] for i in by_count]
+
+    def smallest(self, n_tubes):
+        i = bisect_left(self.running_max, n_tubes)
+        return self.shells[i] if i < len(self.shells) else None
+
+    def in_range(self, min_tubes, max_tubes):
+        start = bisect_left(self.sorted_counts, min_tubes)
+        stop = len(self.sorted_counts) if max_tubes is None else bisect_right(self.sorted_counts, max_tubes)
+        return sorted(self.shells_by_count[start:stop], key=lambda shell: shell.shell_id)
+
+
+def _pipe_sizes(pipes):
+    pipes = sorted(pipes.values(), key=lambda pipe: (pipe.id, pipe.od))
+    nominal, schedule, od, inner, flow_area = zip(*pipes) if pipes else ((),) * 5
+    return PipeSizes(np.array(nominal, dtype=str), np.array(schedule, dtype=str), np.array(od, dtype=float),
+                     np.array(inner, dtype=float), np.array(flow_area, dtype=float))
+
+
+def _index_shells(shells):
+    groups = {}
+    for (tube_od, pitch, layout, _), shell in shells.items():
+        for passes in shell.tube_counts:
+            groups.setdefault((tube_od, pitch, layout, passes), []).append(shell)
+    return {key: ShellCountIndex(group, key[3]) for key, group in sorted(groups.items())}
+
+
+class Catalog:
+    """Indexed pipe, tube, shell and fluid tables."""
+
+    def __init__(self, steel_pipes, copper_tubes, tubes, shells, fluids, water_columns, water_table):
+        self.steel_pipes = steel_pipes      # (nominal in, schedule) -> PipeDimensions
+        self.copper_tubes = copper_tubes    # (nominal in, type) -> PipeDimensions
+        self.tubes = tubes                  # (tube OD in, bwg) -> TubeDimensions
+        self.shells = shells                # (tube OD in, pitch in, layout, shell ID in) -> ShellLayout
+        self.fluids = fluids                # fluid name -> FluidConstants
+        self.water_columns = water_columns  # column names of the saturated water table
+        self.water_table = water_table      # (rows, columns) saturated water properties
+        self.shell_index = _index_shells(shells)    # (tube OD in, pitch in, layout, passes) -> ShellCountIndex
+        self.steel_sizes = _pipe_sizes(steel_pipes)     # PipeSizes arrays for vectorized queries
+        self.copper_sizes = _pipe_sizes(copper_tubes)
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        def pipes(prefix):
+            return {
+                (_size_key(nominal), schedule): PipeDimensions(nominal, schedule, *dims)
+                for nominal, schedule, dims in zip(arrays[f"{prefix}_nominal"].tolist(),
+                                                   arrays[f"{prefix}_schedule"].tolist(),
+                                                   arrays[f"{prefix}_dims"].tolist())
+            }
+
+        tubes = {}
+        for od, bwg, inner in zip(arrays["tube_od_in"].tolist(), arrays["tube_bwg"].tolist(),
+                                  arrays["tube_id_in"].tolist()):
+            tubes[(_size_key(od), bwg)] = TubeDimensions(od * IN_TO_M, bwg, inner * IN_TO_M)
+
+        shells = {}
+        for sizes, layout, counts in zip(arrays["shell_sizes_in"].tolist(), arrays["shell_layout"].tolist(),
+                                         arrays["shell_counts"].tolist()):
+            key = _layout_key(sizes[0], sizes[1], layout, sizes[2])
+            tube_counts = {passes: count for passes, count in zip(TUBE_PASSES, counts) if count >= 0}
+            shells[key] = ShellLayout(key[0] * IN_TO_M, key[1] * IN_TO_M, layout, key[3] * IN_TO_M, tube_counts)
+
+        fluids = {name: FluidConstants(name, *values)
+                  for name, values in zip(arrays["fluid_names"].tolist(), arrays["fluid_values"].tolist())}
+
+        return cls(pipes("steel"), pipes("copper"), tubes, shells, fluids,
+                   arrays["water_columns"].tolist(), arrays["water_table"])
+
+    @classmethod
+    def from_csv(cls):
+        return cls.from_arrays(compile_tables())
+
+    def to_dataframes(self):
+        """Export the catalog as pandas DataFrames (requires pandas)."""
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError("Catalog.to_dataframes() requires pandas (pip install pandas)")
+
+        def shell_rows():
+            for shell in self.shells.values():
+                row = {"tube_od": shell.tube_od, "pitch": shell.pitch, "layout": shell.layout,
+                       "shell_id": shell.shell_id}
+                row.update({f"{passes}_pass": shell.tube_counts.get(passes) for passes in TUBE_PASSES})
+                yield row
+
+        return {
+            "steel_pipes": pd.DataFrame(list(self.steel_pipes.values()), columns=PipeDimensions._fields),
+            "copper_tubes": pd.DataFrame(list(self.copper_tubes.values()), columns=PipeDimensions._fields),
+            "tubes": pd.DataFrame(list(self.tubes.values()), columns=TubeDimensions._fields),
+            "shells": pd.DataFrame(list(shell_rows())),
+            "fluids": pd.DataFrame(list(self.fluids.values()), columns=FluidConstants._fields),
+        }
+
+    def pipe(self, material, nominal, schedule=None, ptype=None):
+        """Dimensions of a steel pipe (by schedule) or copper tube (by type)."""
+        if "Copper" in material:
+            key = (_size_key(nominal), _copper_type(ptype))
+            pipe = self.copper_tubes.get(key)
+        else:
+            if not schedule:
+                raise ValueError("Steel pipe schedule must be selected.")
+            key = (_size_key(nominal), schedule)
+            pipe = self.steel_pipes.get(key)
+
+        if pipe is None:
+            raise ValueError(f"Pipe dimensions not found for: Material='{material}', Dia='{nominal}', "
+                             f"Schedule='{schedule}', Type='{ptype}'.")
+        return pipe
+
+    def pipe_sizes(self, material, schedule=None, ptype=None, min_id=None, max_id=None):
+        """Every steel pipe or copper tube matching the filters, as PipeSizes arrays.
+
+        schedule (steel) or ptype (copper) restricts the rows to one schedule
+        or type; None keeps them all. min_id and max_id bound the inside
+        diameter in meters. Rows are sorted by inside diameter.
+        """
+        if "Copper" in material:
+            sizes = self.copper_sizes
+            selected = _copper_type(ptype) if ptype else None
+        else:
+            sizes = self.steel_sizes
+            selected = schedule
+
+        mask = np.ones(len(sizes.id), dtype=bool)
+        if selected is not None:
+            mask &= sizes.schedule == selected
+        if min_id is not None:
+            mask &= sizes.id >= min_id
+        if max_id is not None:
+            mask &= sizes.id <= max_id
+        return PipeSizes(*(values[mask] for values in sizes))
+
+    def tube(self, tube_od, bwg):
+        """Dimensions of a heat-exchanger tube by OD (in) and BWG."""
+        tube = self.tubes.get((_size_key(tube_od), int(bwg)))
+        if tube is None:
+            raise ValueError(f"Tube dimensions not found for tube_od_in={tube_od}, bwg={bwg}")
+        return tube
+
+    def shell(self, tube_od, pitch, layout, shell_id):
+        """Tube counts for a tube OD, pitch and shell ID (all in inches) and a layout."""
+        shell = self.shells.get(_layout_key(tube_od, pitch, layout, shell_id))
+        if shell is None:
+            raise ValueError(f"Tube count data not found for tube_od={tube_od}, pitch={pitch}, "
+                             f"arrangement={layout}, shell_id={shell_id}")
+        return shell
+
+    def tube_count(self, tube_od, pitch, layout, shell_id, passes):
+        """Number of tubes in a shell for the given number of tube passes."""
+        shell = self.shell(tube_od, pitch, layout, shell_id)
+        count = shell.tube_counts.get(int(passes))
+        if count is None:
+            raise ValueError(f"No tube count listed for {passes} passes with tube_od={tube_od}, "
+                             f"pitch={pitch}, arrangement={layout}, shell_id={shell_id}")
+        return count
+
+    def _shell_group(self, tube_od, pitch, layout, passes):
+        tube_od_key, pitch_key, layout_key, _ = _layout_key(tube_od, pitch, layout, 0)
+        return self.shell_index.get((tube_od_key, pitch_key, layout_key, int(passes)))
+
+    def smallest_shell(self, tube_od, pitch, layout, passes, n_tubes):
+        """Smallest listed shell holding at least n_tubes tubes, or None if none is large enough."""
+        group = self._shell_group(tube_od, pitch, layout, passes)
+        return group.smallest(n_tubes) if group is not None else None
+
+    def shells_in_range(self, tube_od, pitch, layout, passes, min_tubes=0, max_tubes=None):
+        """Shells whose tube count lies in [min_tubes, max_tubes], in order of shell ID."""
+        group = self._shell_group(tube_od, pitch, layout, passes)
+        return group.in_range(min_tubes, max_tubes) if group is not None else []
+
+    def fluid(self, name):
+        """Constant density and viscosity of a fluid from the fluid property table."""
+        fluid = self.fluids.get(name)
+        if fluid is None:
+            raise ValueError(f"Fluid properties not found for '{name}'.")
+        return fluid
+
+
+_catalog = None
+
+
+def get_catalog():
+    """Return the shared catalog, loading the compiled artifact (or the CSVs) on first use."""
+    global _catalog
+    if _catalog is None:
+        try:
+            arrays = load_artifact()
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            arrays = compile_tables()
+            try:
+                save_artifact(arrays)
+            except OSError:
+                # Unwritable cache directory; keep the compiled tables in memory only
+                pass
+        _catalog = Catalog.from_arrays(arrays)
+    return _catalog
+
+
+def pipe_dimensions(material, nominal, schedule=None, ptype=None):
+    return get_catalog().pipe(material, nominal, schedule, ptype)
+
+
+def pipe_sizes(material, schedule=None, ptype=None, min_id=None, max_id=None):
+    return get_catalog().pipe_sizes(material, schedule, ptype, min_id, max_id)
+
+
+def tube_dimensions(tube_od, bwg):
+    return get_catalog().tube(tube_od, bwg)
+
+
+def shell_layout(tube_od, pitch, layout, shell_id):
+    return get_catalog().shell(tube_od, pitch, layout, shell_id)
+
+
+def tube_count(tube_od, pitch, layout, shell_id, passes):
+    return get_catalog().tube_count(tube_od, pitch, layout, shell_id, passes)
+
+
+def smallest_shell(tube_od, pitch, layout, passes, n_tubes):
+    return get_catalog().smallest_shell(tube_od, pitch, layout, passes, n_tubes)
+
+
+def shells_in_range(tube_od, pitch, layout, passes, min_tubes=0, max_tubes=None):
+    return get_catalog().shells_in_range(tube_od, pitch, layout, passes, min_tubes, max_tubes)
+
+
+def fluid_constants(name):
+    return get_catalog().fluid(name)
+
+
+if __name__ == "__main__":
+    build_artifact()
+    print(f"Wrote {CATALOG_PATH}")
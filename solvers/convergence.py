@@ -0,0 +1,236 @@
+"""
+Fixed-point driver for the exchanger outlet-temperature iterations.
+
+The exchanger solvers guess outlet temperatures, evaluate properties at the
+resulting mean temperatures and recompute the outlets. IterationDriver runs
+that map for all of them with one definition of convergence: the largest
+change |g(x) - x| of any outlet, in kelvin. The default method is Anderson
+mixing. Each step combines the last few iterates so the update behaves like
+a secant/Newton step without needing derivatives, which converges in far
+fewer property evaluations than plain ("picard") substitution.
+
+Every solve returns its iteration count, residual history and wall time,
+and the driver keeps those results so the metrics of many solves, across
+solver types, can be compared:
+
+    driver = IterationDriver(tolerance=1e-4)
+    calculate_dphx(..., driver=driver)
+    calculate_shelltube(..., driver=driver)
+    driver.summary()
+
+solve_bracketed() is the matching one-dimensional root finder (Brent's
+method) for inverse problems such as sizing an exchanger for a target
+outlet temperature.
+"""
+
+import math
+import time
+from typing import NamedTuple
+import numpy as np
+
+DEFAULT_TOLERANCE_K = 1e-3
+DEFAULT_MAX_ITERATIONS = 50
+ANDERSON_MEMORY = 3
+METHODS = ("anderson", "picard")
+
+
+class ConvergenceError(ValueError):
+    """Raised when a fixed-point iteration fails to meet its tolerance."""
+
+    def __init__(self, message, iterations, residual, x):
+        super().__init__(message)
+        self.iterations = iterations
+        self.residual = residual
+        self.x = x
+
+
+class OutletState(NamedTuple):
+    """Converged outlet temperatures of an exchanger, in K.
+
+    Solvers return it with return_state=True and accept it back as
+    initial_state to warm-start a neighbouring solve.
+    """
+    warm_outlet: float
+    cool_outlet: float
+
+
+class FixedPointResult(NamedTuple):
+    x: np.ndarray       # Converged values, g(x) at the last iterate
+    iterations: int     # Number of evaluations of g
+    residual: float     # max |g(x) - x| at the last iterate
+    history: tuple      # Residual after each evaluation
+    seconds: float      # Wall time of the solve
+
+
+class IterationDriver:
+    """Solve x = g(x) with a fixed tolerance, iteration cap and method.
+
+    callbacks are called as callback(iteration, x, residual) after every
+    evaluation of g. The result (or ConvergenceError) of each solve is kept
+    in results / failures for summary().
+    """
+
+    def __init__(self, tolerance=DEFAULT_TOLERANCE_K, max_iterations=DEFAULT_MAX_ITERATIONS,
+                 method="anderson", memory=ANDERSON_MEMORY, callbacks=()):
+        if tolerance <= 0:
+            raise ValueError(f"Tolerance must be positive, got {tolerance}")
+        if max_iterations < 1:
+            raise ValueError(f"max_iterations must be at least 1, got {max_iterations}")
+        if method not in METHODS:
+            raise ValueError(f"Unknown iteration method '{method}', expected one of {', '.join(METHODS)}")
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.method = method
+        self.memory = memory if method == "anderson" else 0
+        self.callbacks = tuple(callbacks)
+        self.results = []
+        self.failures = []
+
+    def solve(self, func, x0):
+        """Iterate func from x0 until max |func(x) - x| <= tolerance.
+
+        Raises ConvergenceError after max_iterations evaluations of func.
+        """
+        start = time.perf_counter()
+        x = np.array(x0, dtype=float)
+        g = np.asarray(func(x), dtype=float)
+        r = g - x
+        iterations = 1
+        residual = float(np.max(np.abs(r)))
+        history = [residual]
+        self._notify(iterations, g, residual)
+
+        delta_x = []    # recent x differences
+        delta_r = []    # recent residual differences
+        while residual > self.tolerance:
+            if iterations >= self.max_iterations or not np.isfinite(residual):
+                error = ConvergenceError(f"Outlet temperatures did not converge in {iterations} iterations "
+                                         f"(residual {residual:.3g}, tolerance {self.tolerance:.3g})",
+                                         iterations, residual, g)
+                self.failures.append(error)
+                raise error
+
+            if iterations > 1 and self.memory:
+                delta_x.append(x - x_prev)
+                delta_r.append(r - r_prev)
+                if len(delta_x) > self.memory:
+                    del delta_x[0], delta_r[0]
+            x_prev, r_prev = x, r
+
+            # Anderson (type II) step; plain substitution until there is history
+            x = g
+            if delta_r:
+                dX = np.column_stack(delta_x)
+                dR = np.column_stack(delta_r)
+                gamma = np.linalg.lstsq(dR, r, rcond=None)[0]
+                accelerated = x_prev + r - (dX + dR) @ gamma
+                if np.all(np.isfinite(accelerated)):
+                    x = accelerated
+
+            g = np.asarray(func(x), dtype=float)
+            r = g - x
+            iterations += 1
+            residual = float(np.max(np.abs(r)))
+            history.append(residual)
+            self._notify(iterations, g, residual)
+
+        result = FixedPointResult(g, iterations, residual, tuple(history), time.perf_counter() - start)
+        self.results.append(result)
+        return result
+
+    def _notify(self, iteration, x, residual):
+        for callback in self.callbacks:
+            callback(iteration, x, residual)
+
+    def summary(self):
+        """Iteration and timing totals over every solve run by this driver."""
+        iterations = [result.iterations for result in self.results]
+        return {
+            "solves": len(self.results),
+            "failures": len(self.failures),
+            "iterations": sum(iterations),
+            "mean_iterations": sum(iterations) / len(iterations) if iterations else 0.0,
+            "max_iterations": max(iterations, default=0),
+            "seconds": sum(result.seconds for result in self.results),
+        }
+
+
+def solve_fixed_point(func, x0, tolerance=DEFAULT_TOLERANCE_K, max_iterations=DEFAULT_MAX_ITERATIONS,
+                      memory=ANDERSON_MEMORY):
+    """Solve x = func(x) with Anderson acceleration (a one-off IterationDriver)."""
+    return IterationDriver(tolerance, max_iterations, memory=memory).solve(func, x0)
+
+
+class RootResult(NamedTuple):
+    x: float            # Root estimate
+    iterations: int     # Number of evaluations of func
+    residual: float     # func at the root estimate
+
+
+def solve_bracketed(func, a, b, fa=None, fb=None, xtol=1e-6, max_iterations=100):
+    """Root of func between a and b by Brent's method.
+
+    Combines bisection with secant and inverse quadratic interpolation
+    steps, so it never leaves the bracket yet converges superlinearly on
+    smooth functions. func(a) and func(b) must differ in sign; pass fa / fb
+    when they are already known. Raises ConvergenceError after
+    max_iterations evaluations of func.
+    """
+    iterations = 0
+    if fa is None:
+        fa = func(a)
+        iterations += 1
+    if fb is None:
+        fb = func(b)
+        iterations += 1
+    if fa == 0:
+        return RootResult(a, iterations, fa)
+    if fb == 0:
+        return RootResult(b, iterations, fb)
+    if (fa > 0) == (fb > 0):
+        raise ValueError(f"Root is not bracketed: f({a:.6g}) = {fa:.6g} and f({b:.6g}) = {fb:.6g} have the same sign")
+
+    c, fc = b, fb
+    while True:
+        # Keep the root between b and c, with b the best estimate
+        if (fb > 0) == (fc > 0):
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+
+        tol = 2 * np.finfo(float).eps * abs(b) + 0.5 * xtol
+        half = 0.5 * (c - b)
+        if abs(half) <= tol or fb == 0:
+            return RootResult(b, iterations, fb)
+        if iterations >= max_iterations:
+            raise ConvergenceError(f"Root did not converge in {iterations} iterations "
+                                   f"(bracket width {abs(c - b):.3g}, tolerance {xtol:.3g})",
+                                   iterations, abs(fb), b)
+
+        if abs(e) >= tol and abs(fa) > abs(fb):
+            # Secant (two points) or inverse quadratic interpolation (three)
+            s = fb / fa
+            if a == c:
+                p = 2 * half * s
+                q = 1 - s
+            else:
+                q = fa / fc
+                r = fb / fc
+                p = s * (2 * half * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * half * q - abs(tol * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = half        # interpolation rejected, bisect
+        else:
+            d = e = half            # bisect
+
+        a, fa = b, fb
+        b += d if abs(d) > tol else math.copysign(tol, half)
+        fb = func(b)
+        iterations += 1
@@ -1,7 +1,8 @@
 import numpy as np
-from pathlib import Path
-import pandas as pd
-from CoolProp.CoolProp import PropsSI
+from typing import NamedTuple
+from solvers.catalog import pipe_dimensions
+from solvers.convergence import DEFAULT_MAX_ITERATIONS, DEFAULT_TOLERANCE_K, IterationDriver, OutletState, solve_bracketed
+from solvers.properties import FluidProperties, fluid_props, fluid_props_array, solver_scope
 import math # Import math for exp
 
 # Conversion Factors
@@ -9,120 +10,145 @@ DEG_C_TO_K = 273.15
 DEG_F_TO_K = lambda F: (F - 32) * 5/9 + DEG_C_TO_K
 IN_TO_M = 0.0254
 
-def calculate_dphx(
-        length, material, nominal_dia_inner, nominal_dia_outer,
-        fluid1, fluid1_inlet_temp, fluid1_mass_flow,
-        fluid2, fluid2_inlet_temp, fluid2_mass_flow, schedule, ptype):
-
-    # Set default pressure (Atmospheric)
-    pressure_pa = 101325
-
-    # Convert string inputs to numerical types
-    length = float(length)
-    fluid1_inlet_temp_C = float(fluid1_inlet_temp) # Keep Celsius for initial comparison
-    fluid2_inlet_temp_C = float(fluid2_inlet_temp) # Keep Celsius for initial comparison
-    fluid1_mass_flow = float(fluid1_mass_flow)
-    fluid2_mass_flow = float(fluid2_mass_flow)
+# Set default pressure (Atmospheric)
+pressure_pa = 101325
 
-    # Pipe Dimension Lookup
-    BASE_PATH = Path(__file__).parent.parent
-    PIPE_DIMENSIONS_PATH = BASE_PATH / "tables" / "pipe_dimensions.csv"
-    COPPER_PIPE_PATH = BASE_PATH / "tables" / "seamless_copper_tubing.csv"
-    copper_pipe_dimensions = pd.read_csv(COPPER_PIPE_PATH)
-    pipe_dimensions = pd.read_csv(PIPE_DIMENSIONS_PATH)
-
-    # Change 1: Standardized pipe dimensions lookup and conversion to meters
-    ID_p_m = 0.0
-    OD_p_m = 0.0
-    ID_a_m = 0.0
-
-    if "Steel" in material:
-        pipe_data_inner = pipe_dimensions.loc[
-            (pipe_dimensions["Nominal Diameter in"] == nominal_dia_inner) &
-            (pipe_dimensions["Schedule"] == schedule)
-        ]
-        pipe_data_outer = pipe_dimensions.loc[
-            (pipe_dimensions["Nominal Diameter in"] == nominal_dia_outer) &
-            (pipe_dimensions["Schedule"] == schedule)
-        ]
-
-        if pipe_data_inner.empty or pipe_data_outer.empty:
-            raise ValueError(f"Pipe dimensions not found for Steel material with nominal diameter inner={nominal_dia_inner}, outer={nominal_dia_outer}, schedule={schedule}")
-
-        pipe_dict_inner = pipe_data_inner.iloc[0].to_dict()
-        pipe_dict_outer = pipe_data_outer.iloc[0].to_dict()
-
-        # Convert cm to meters and ensure values are floats before calculation
-        try:
-            ID_p_m = float(pipe_dict_inner["Inside Diameter cm"]) / 100.0  # Divide by 100 for cm -> m
-            OD_p_m = float(pipe_dict_inner["Outside Diameter cm"]) / 100.0  # Divide by 100 for cm -> m
-            ID_a_m = float(pipe_dict_outer["Inside Diameter cm"]) / 100.0  # Divide by 100 for cm -> m
-        except ValueError:
-            # This handles cases where the CSV might have unexpected non-numeric data
-            raise ValueError("Could not convert pipe dimensions from CSV to numbers. Check the CSV file for errors.")
 
-    elif "Copper" in material:
-        if not ptype or len(ptype) == 0:
-            raise ValueError("Pipe type (ptype) cannot be empty for Copper material")
+class DoublePipeGeometry(NamedTuple):
+    """Temperature-independent geometry of a double-pipe exchanger (SI units)."""
+    length: float   # Exchanger length, m
+    ID_p: float     # Inside diameter of the inner pipe, m
+    OD_p: float     # Outside diameter of the inner pipe, m
+    ID_a: float     # Inside diameter of the outer pipe, m
+    A_p: float      # Flow area, inner pipe, m^2
+    A_a: float      # Flow area, annulus, m^2
+    D_h: float      # Annulus hydraulic diameter (friction), m
+    D_e: float      # Annulus equivalent diameter (heat transfer), m
+    A_o: float      # Heat transfer area (outer surface of inner pipe), m^2
 
-        pipe_type = ptype.split(" ")[-1] # Get 'K', 'L', or 'M'
 
-        pipe_data_inner = copper_pipe_dimensions.loc[
-            (copper_pipe_dimensions["Standard Size in"] == nominal_dia_inner) &
-            (copper_pipe_dimensions["Type"] == pipe_type)
-        ]
-        pipe_data_outer = copper_pipe_dimensions.loc[
-            (copper_pipe_dimensions["Standard Size in"] == nominal_dia_outer) &
-            (copper_pipe_dimensions["Type"] == pipe_type)
-        ]
+def dphx_geometry(length, material, nominal_dia_inner, nominal_dia_outer, schedule, ptype):
+    """Look up the two pipes and precompute flow areas and diameters."""
+    length = float(length)
 
-        if pipe_data_inner.empty or pipe_data_outer.empty:
-            raise ValueError(f"Pipe dimensions not found for Copper material with nominal diameter inner={nominal_dia_inner}, outer={nominal_dia_outer}, type={pipe_type}")
+    # Pipe Dimension Lookup (catalog values are in meters)
+    if "Steel" not in material and "Copper" not in material:
+        raise ValueError(f"Unknown pipe material: {material}")
+    if "Copper" in material and not ptype:
+        raise ValueError("Pipe type (ptype) cannot be empty for Copper material")
 
-        pipe_dict_inner = pipe_data_inner.iloc[0].to_dict()
-        pipe_dict_outer = pipe_data_outer.iloc[0].to_dict()
+    inner_pipe = pipe_dimensions(material, nominal_dia_inner, schedule, ptype)
+    outer_pipe = pipe_dimensions(material, nominal_dia_outer, schedule, ptype)
 
-        # Convert cm or inches to meters
-        ID_p_m = pipe_dict_inner["Inside Diameter cm"] / 100.0 # cm to m
-        OD_p_m = pipe_dict_inner["Outside Diameter in"] * IN_TO_M # in to m
-        ID_a_m = pipe_dict_outer["Inside Diameter cm"] / 100.0 # cm to m
+    ID_p_m = inner_pipe.id
+    OD_p_m = inner_pipe.od
+    ID_a_m = outer_pipe.id
 
     # Calculate Flow Areas in m^2
     A_p = np.pi * (ID_p_m**2) / 4.0
     A_a = np.pi * (ID_a_m**2 - OD_p_m**2) / 4.0
 
-    # Fluid Assignment
+    # Annulus Equivalent Diameters (using meters)
+    D_h = ID_a_m - OD_p_m # Hydraulic diameter for friction
+    D_e = (ID_a_m**2 - OD_p_m**2) / OD_p_m # Equivalent diameter for heat transfer
+
+    A_o_total = np.pi * OD_p_m * length # Total heat transfer area (outer surface of inner pipe)
+
+    return DoublePipeGeometry(length, ID_p_m, OD_p_m, ID_a_m, A_p, A_a, D_h, D_e, A_o_total)
+
+
+def assign_fluids(fluid1, fluid1_inlet_temp, fluid1_mass_flow, fluid2, fluid2_inlet_temp, fluid2_mass_flow):
+    """Order the two streams as (warm fluid, inlet K, mass flow, cool fluid, inlet K, mass flow)."""
+    fluid1_inlet_temp_C = float(fluid1_inlet_temp)
+    fluid2_inlet_temp_C = float(fluid2_inlet_temp)
+    fluid1_mass_flow = float(fluid1_mass_flow)
+    fluid2_mass_flow = float(fluid2_mass_flow)
+
     # Identify warm and cool fluids based on inlet temperatures
     if fluid1_inlet_temp_C > fluid2_inlet_temp_C:
-        warm_fluid = fluid1
-        cool_fluid = fluid2
-        m_w = fluid1_mass_flow
-        m_c = fluid2_mass_flow
-        Temp1 = fluid1_inlet_temp_C + DEG_C_TO_K # Warm fluid inlet temp in K
-        temp1 = fluid2_inlet_temp_C + DEG_C_TO_K # Cool fluid inlet temp in K
-    else:
-        warm_fluid = fluid2
-        cool_fluid = fluid1
-        m_w = fluid2_mass_flow
-        m_c = fluid1_mass_flow
-        Temp1 = fluid2_inlet_temp_C + DEG_C_TO_K # Warm fluid inlet temp in K
-        temp1 = fluid1_inlet_temp_C + DEG_C_TO_K # Cool fluid inlet temp in K
+        return (fluid1, fluid1_inlet_temp_C + DEG_C_TO_K, fluid1_mass_flow,
+                fluid2, fluid2_inlet_temp_C + DEG_C_TO_K, fluid2_mass_flow)
+    return (fluid2, fluid2_inlet_temp_C + DEG_C_TO_K, fluid2_mass_flow,
+            fluid1, fluid1_inlet_temp_C + DEG_C_TO_K, fluid1_mass_flow)
+
 
-    # Iteration Loop for Temperature Convergence
-    t_loop = True
-    iterations = 0
-    max_iterations = 20 # Safety break for the loop
+def warm_in_pipe(geometry, m_w, m_c):
+    """Whether the warm fluid flows in the inner pipe (higher mass flow in larger area)."""
+    A_p_larger = geometry.A_p > geometry.A_a
+    m_w_greater = m_w > m_c
+    return (m_w_greater and A_p_larger) or (not m_w_greater and not A_p_larger)
 
-    # Initial Guesses for outlet temperatures (midpoint in K)
-    Temp2 = (Temp1 + temp1) * 0.5
-    temp2 = (Temp1 + temp1) * 0.5
 
-    # Store previous iteration average temps for convergence check
-    Tavg_prev = Temp1 # Initialize with inlet temps
-    tavg_prev = temp1
+def overall_coefficient(geometry, warm_in, m_w, m_c, warm, cool):
+    """Clean U_o from warm and cool FluidProperties bundles.
 
-    while t_loop and iterations < max_iterations:
-        iterations += 1
+    The bundles may hold arrays (one entry per segment); the correlations
+    are evaluated element-wise and a float is returned for scalar input.
+    """
+    ID_p_m = geometry.ID_p
+    D_e = geometry.D_e
+    length = geometry.length
+
+    # Heating fluids use a Pr exponent of 0.4, cooling fluids 0.3
+    if warm_in:
+        pipe, m_p, n_p = warm, m_w, 0.3
+        annulus, m_a, n_a = cool, m_c, 0.4
+    else:
+        pipe, m_p, n_p = cool, m_c, 0.4
+        annulus, m_a, n_a = warm, m_w, 0.3
+
+    V_p = m_p / (pipe.rho * geometry.A_p)
+    V_a = m_a / (annulus.rho * geometry.A_a)
+    Re_p = (V_p * ID_p_m) / pipe.nu
+    Re_a = (V_a * geometry.D_h) / annulus.nu # Use D_h for annulus Reynolds number
+
+    # Nusselt Numbers (laminar below Re = 2300)
+    Nu_p = np.where(Re_p < 2300, 1.86*(ID_p_m*Re_p*pipe.pr/length), 0.023 * (Re_p ** 0.8) * (pipe.pr ** n_p))
+    Nu_a = np.where(Re_a < 2300, 1.86*(D_e*Re_a*annulus.pr/length), 0.023 * (Re_a ** 0.8) * (annulus.pr ** n_a))
+
+    # Convection Coefficients
+    h_i = Nu_p * pipe.k / ID_p_m # Inside pipe
+    h_o = Nu_a * annulus.k / D_e # Annulus, use D_e for Nu_a -> h_o calculation
+
+    # Simplified Overall Heat Transfer Coefficient (neglecting wall resistance and fouling)
+    h_p = h_i * (ID_p_m / geometry.OD_p)
+    U_o = (1/h_p + 1/h_o)**(-1)
+    if U_o.ndim == 0:
+        return float(U_o)
+    return U_o
+
+
+class DoublePipeSolution(NamedTuple):
+    """Converged bulk double-pipe state."""
+    warm_outlet: float  # Warm fluid outlet temperature, K
+    cool_outlet: float  # Cool fluid outlet temperature, K
+    U_o: float          # Clean overall coefficient, W/m^2-K
+    q: float            # Heat transfer rate, W
+    cp_w: float         # Warm fluid specific heat at its mean temperature, J/kg-K
+    cp_c: float         # Cool fluid specific heat at its mean temperature, J/kg-K
+    iterations: int     # Fixed-point iterations
+    residual: float     # Final fixed-point residual, K
+
+
+def solve_dphx(geometry, warm_fluid, Temp1, m_w, cool_fluid, temp1, m_c, backend=None, driver=None,
+               initial_state=None):
+    """Iterate the outlet temperatures (K) of one geometry and pair of streams.
+
+    Properties are evaluated at one bulk mean temperature per fluid through
+    the cached property layer. The iteration starts from initial_state (an
+    OutletState) when given, else from the midpoint of the inlets.
+    """
+    warm_in = warm_in_pipe(geometry, m_w, m_c)
+    A_o_total = geometry.A_o
+    if driver is None:
+        driver = IterationDriver()
+
+    # Values from the latest evaluation, used after convergence
+    evaluation = {}
+
+    def outlet_temps(outlets):
+        """Outlet temperatures (K) implied by properties at the mean of inlet and guessed outlet."""
+        Temp2, temp2 = outlets
 
         # Calculate average temperatures for property lookup (in K)
         Tavg = (Temp1 + Temp2) * 0.5
@@ -130,81 +156,14 @@ def calculate_dphx(
 
         # --- Fluid Property Lookup using CoolProp (at average temps) ---
         try:
-            rho_w = PropsSI('D', 'T', Tavg, 'P', pressure_pa, warm_fluid)
-            cp_w = PropsSI('Cpmass', 'T', Tavg, 'P', pressure_pa, warm_fluid)
-            k_w = PropsSI('L', 'T', Tavg, 'P', pressure_pa, warm_fluid)
-            mu_w = PropsSI('V', 'T', Tavg, 'P', pressure_pa, warm_fluid)
-            pr_w = PropsSI('Prandtl', 'T', Tavg, 'P', pressure_pa, warm_fluid)
-            nu_w = mu_w / rho_w
-
-            rho_c = PropsSI('D', 'T', tavg, 'P', pressure_pa, cool_fluid)
-            cp_c = PropsSI('Cpmass', 'T', tavg, 'P', pressure_pa, cool_fluid)
-            k_c = PropsSI('L', 'T', tavg, 'P', pressure_pa, cool_fluid)
-            mu_c = PropsSI('V', 'T', tavg, 'P', pressure_pa, cool_fluid)
-            pr_c = PropsSI('Prandtl', 'T', tavg, 'P', pressure_pa, cool_fluid)
-            nu_c = mu_c / rho_c
+            warm = fluid_props(warm_fluid, Tavg, pressure_pa, backend)
+            cool = fluid_props(cool_fluid, tavg, pressure_pa, backend)
         except ValueError as e:
             raise ValueError(f"CoolProp Error: {e}. Check fluid names and temperature/pressure ranges.")
+        cp_w = warm.cp
+        cp_c = cool.cp
 
-        # Convection Coefficient Calculations
-        # Annulus Equivalent Diameters (using meters)
-        D_h = ID_a_m - OD_p_m # Hydraulic diameter for friction
-        D_e = (ID_a_m**2 - OD_p_m**2) / OD_p_m # Equivalent diameter for heat transfer
-
-        # Check which fluid goes where (higher mass flow in larger area)
-        A_p_larger = A_p > A_a
-        m_w_greater = m_w > m_c
-
-        # Case 1: Warm fluid in pipe (m_w, A_p), Cool fluid in annulus (m_c, A_a)
-        if (m_w_greater and A_p_larger) or (not m_w_greater and not A_p_larger):
-            V_p = m_w / (rho_w * A_p)
-            V_a = m_c / (rho_c * A_a)
-            Re_p = (V_p * ID_p_m) / nu_w
-            Re_a = (V_a * D_h) / nu_c # Use D_h for annulus Reynolds number
-
-            # Nusselt Numbers
-            if Re_p < 2300:
-                Nu_p = 1.86*(ID_p_m*Re_p*pr_w/length)
-            else: # Turbulent
-                Nu_p = 0.023 * (Re_p ** 0.8) * (pr_w ** 0.3)
-
-            # Annulus (Cool fluid heating -> Pr exponent = 0.4)
-            if Re_a < 2300:
-                Nu_p = 1.86 * (D_e * Re_a * pr_c / length)
-            else: # Turbulent
-                Nu_a = 0.023 * (Re_a ** 0.8) * (pr_c ** 0.4)
-
-            # Convection Coefficients
-            h_i = Nu_p * k_w / ID_p_m # Inside pipe (warm fluid)
-            h_o = Nu_a * k_c / D_e # Annulus (cool fluid), use D_e for Nu_a -> h_o calculation
-
-        # Case 2: Cool fluid in pipe (m_c, A_p), Warm fluid in annulus (m_w, A_a)
-        else:
-            V_p = m_c / (rho_c * A_p)
-            V_a = m_w / (rho_w * A_a)
-            Re_p = (V_p * ID_p_m) / nu_c
-            Re_a = (V_a * D_h) / nu_w # Use D_h for annulus Reynolds number
-
-            # Nusselt Numbers
-            # Pipe (Cool fluid heating -> Pr exponent = 0.4)
-            if Re_p < 2300:
-                Nu_p = 1.86*(ID_p_m*Re_p*pr_c/length)
-            else: # Turbulent
-                Nu_p = 0.023 * (Re_p ** 0.8) * (pr_c ** 0.4)
-
-            # Annulus (Warm fluid cooling -> Pr exponent = 0.3)
-            if Re_a < 2300:
-                Nu_a = 1.86*(D_e*Re_a*pr_w/length)
-            else: # Turbulent
-                Nu_a = 0.023 * (Re_a ** 0.8) * (pr_w ** 0.3)
-
-            # Convection Coefficients
-            h_i = Nu_p * k_c / ID_p_m # Inside pipe (cool fluid)
-            h_o = Nu_a * k_w / D_e # Annulus (warm fluid), use D_e for Nu_a -> h_o calculation
-
-        # Simplified Overall Heat Transfer Coefficient (neglecting wall resistance and fouling)
-        h_p = h_i * (ID_p_m / OD_p_m)
-        U_o = (1/h_p + 1/h_o)**(-1)
+        U_o = overall_coefficient(geometry, warm_in, m_w, m_c, warm, cool)
 
         # Effectiveness-NTU Calculation
         C_w = m_w * cp_w
@@ -213,8 +172,6 @@ def calculate_dphx(
         C_max = max(C_w, C_c)
         Cr = C_min / C_max
 
-        A_o_total = np.pi * OD_p_m * length # Total heat transfer area (outer surface of inner pipe)
-
         NTU = U_o * A_o_total / C_min
 
         # Effectiveness (epsilon) for counterflow
@@ -227,30 +184,55 @@ def calculate_dphx(
         # Calculate Heat Transfer Rate
         q = epsilon * C_min * (Temp1 - temp1) # Temp1 = T_h_in, temp1 = T_c_in
 
-        # Calculate Outlet Temperatures using energy balance
-        Temp2_new = Temp1 - q / C_w
-        temp2_new = temp1 + q / C_c
-
-        # --- Convergence Check ---
-        Tavg_new = (Temp1 + Temp2_new) / 2.0
-        tavg_new = (temp1 + temp2_new) / 2.0
+        evaluation.update(U_o=U_o, q=q, cp_w=cp_w, cp_c=cp_c)
 
-        # Check relative change in average temperatures
-        T_error = abs(Tavg_new - Tavg_prev) / Tavg_prev if Tavg_prev != 0 else 0
-        t_error = abs(tavg_new - tavg_prev) / tavg_prev if tavg_prev != 0 else 0
+        # Calculate Outlet Temperatures using energy balance
+        return (Temp1 - q / C_w, temp1 + q / C_c)
 
-        # Update outlet temps and previous average temps for next iteration
-        Temp2 = Temp2_new
-        temp2 = temp2_new
-        Tavg_prev = Tavg_new
-        tavg_prev = tavg_new
+    # Fixed-point iteration on the outlet temperatures (K),
+    # starting from the midpoint of the inlets unless warm-started
+    if initial_state is None:
+        T_mid = (Temp1 + temp1) * 0.5
+        initial_state = OutletState(T_mid, T_mid)
+    solution = driver.solve(outlet_temps, initial_state)
+    Temp2, temp2 = solution.x
+    return DoublePipeSolution(float(Temp2), float(temp2), evaluation["U_o"], evaluation["q"],
+                              evaluation["cp_w"], evaluation["cp_c"], solution.iterations, solution.residual)
 
-        # Check if converged
-        if T_error < 0.005 and t_error < 0.005:
-            t_loop = False
 
-    if iterations == max_iterations:
-        print("Warning: Max iterations reached, results may not be fully converged.")
+@solver_scope
+def calculate_dphx(
+        length, material, nominal_dia_inner, nominal_dia_outer,
+        fluid1, fluid1_inlet_temp, fluid1_mass_flow,
+        fluid2, fluid2_inlet_temp, fluid2_mass_flow, schedule, ptype, backend=None,
+        tolerance=DEFAULT_TOLERANCE_K, max_iterations=DEFAULT_MAX_ITERATIONS,
+        initial_state=None, return_state=False, driver=None):
+    """Double-pipe exchanger outlet temperatures, U and duty.
+
+    Properties are evaluated at one bulk mean temperature per fluid. The
+    outlet temperatures are iterated by driver (an IterationDriver, by
+    default one built from tolerance and max_iterations) until they change
+    by less than its tolerance (K); ConvergenceError is raised after
+    max_iterations. The iteration starts from initial_state (an OutletState)
+    when given, else from the midpoint of the inlets. With return_state=True
+    the converged OutletState is returned after the results dict.
+    """
+
+    geometry = dphx_geometry(length, material, nominal_dia_inner, nominal_dia_outer, schedule, ptype)
+    warm_fluid, Temp1, m_w, cool_fluid, temp1, m_c = assign_fluids(
+        fluid1, fluid1_inlet_temp, fluid1_mass_flow, fluid2, fluid2_inlet_temp, fluid2_mass_flow)
+    A_o_total = geometry.A_o
+
+    if driver is None:
+        driver = IterationDriver(tolerance, max_iterations)
+
+    solution = solve_dphx(geometry, warm_fluid, Temp1, m_w, cool_fluid, temp1, m_c, backend, driver, initial_state)
+    Temp2 = solution.warm_outlet
+    temp2 = solution.cool_outlet
+    U_o = solution.U_o
+    q = solution.q
+    cp_w = solution.cp_w
+    cp_c = solution.cp_c
 
     # Final Calculations (Post-Convergence)
     # Log Mean Temp Diff (Counter Flow)
@@ -297,5 +279,253 @@ def calculate_dphx(
         "Cool Fluid Outlet Temp": f"{temp2_C:.2f} °C",
         "Exchanger Coefficient": f"{U_o:.2f}",
         "Heat Transfer Rate": f"{q:.2f} W",
+        "Iterations": f"{solution.iterations}",
+        "Residual": f"{solution.residual:.2e} K",
+    }
+    if return_state:
+        return results, OutletState(Temp2, temp2)
+    return results
+
+# Length search for size_dphx_length, m
+SIZING_MIN_LENGTH = 1e-3
+SIZING_INITIAL_LENGTH = 1.0
+SIZING_MAX_LENGTH = 10000.0
+
+
+@solver_scope
+def size_dphx_length(
+        target_outlet, material, nominal_dia_inner, nominal_dia_outer,
+        fluid1, fluid1_inlet_temp, fluid1_mass_flow,
+        fluid2, fluid2_inlet_temp, fluid2_mass_flow, schedule, ptype, stream="cool", backend=None,
+        length_tolerance=1e-4, tolerance=DEFAULT_TOLERANCE_K, max_iterations=DEFAULT_MAX_ITERATIONS,
+        max_length=SIZING_MAX_LENGTH):
+    """Length of double pipe at which the stream's outlet reaches target_outlet (°C).
+
+    stream is "warm" or "cool". The pipes are looked up once and only the
+    length-dependent geometry changes between evaluations. Each evaluation
+    is warm-started from the previous outlet state and repeats mean
+    temperatures the property cache already holds. The length is bracketed
+    between SIZING_MIN_LENGTH and a length doubled from
+    SIZING_INITIAL_LENGTH up to max_length, then found by Brent's method to
+    length_tolerance (m). ValueError is raised when the target is not
+    bracketed: it is passed at SIZING_MIN_LENGTH, not reached by
+    max_length, or the outlet does not depend on length (as with the
+    laminar correlation, where U scales with 1/length and UA is constant).
+    """
+    if stream not in ("warm", "cool"):
+        raise ValueError(f"Stream must be 'warm' or 'cool', got '{stream}'")
+
+    base = dphx_geometry(SIZING_INITIAL_LENGTH, material, nominal_dia_inner, nominal_dia_outer, schedule, ptype)
+    warm_fluid, Temp1, m_w, cool_fluid, temp1, m_c = assign_fluids(
+        fluid1, fluid1_inlet_temp, fluid1_mass_flow, fluid2, fluid2_inlet_temp, fluid2_mass_flow)
+
+    target = float(target_outlet) + DEG_C_TO_K
+    if not temp1 < target < Temp1:
+        raise ValueError(f"Target outlet {float(target_outlet):.2f} °C must lie between the inlet temperatures "
+                         f"({temp1 - DEG_C_TO_K:.2f} °C and {Temp1 - DEG_C_TO_K:.2f} °C)")
+    inlet = Temp1 if stream == "warm" else temp1
+
+    driver = IterationDriver(tolerance, max_iterations)
+    solutions = {}
+    state = [None]
+
+    def miss(length):
+        """Signed distance of the stream outlet from the target at a given length (K)."""
+        geometry = base._replace(length=length, A_o=np.pi * base.OD_p * length)
+        solution = solve_dphx(geometry, warm_fluid, Temp1, m_w, cool_fluid, temp1, m_c, backend, driver, state[0])
+        state[0] = OutletState(solution.warm_outlet, solution.cool_outlet)
+        solutions[length] = solution
+        outlet = solution.warm_outlet if stream == "warm" else solution.cool_outlet
+        return abs(outlet - inlet) - abs(target - inlet)
+
+    # The outlet can only be bracketed at positive lengths; the correlations
+    # divide by the length
+    lower = SIZING_MIN_LENGTH
+    f_lower = f_min = miss(lower)
+    if f_lower > 0:
+        raise ValueError(f"Target outlet {float(target_outlet):.2f} °C is already passed at "
+                         f"{SIZING_MIN_LENGTH:g} m")
+    upper = max(SIZING_INITIAL_LENGTH, lower)
+    f_upper = miss(upper)
+    while f_upper < 0:
+        if abs(f_upper - f_min) <= tolerance:
+            raise ValueError(f"The {stream} outlet does not change between {SIZING_MIN_LENGTH:g} m and {upper:g} m "
+                             f"(laminar flow), so no length reaches {float(target_outlet):.2f} °C")
+        if upper >= max_length:
+            raise ValueError(f"Target outlet {float(target_outlet):.2f} °C is not reached within {max_length:g} m")
+        lower, f_lower = upper, f_upper
+        upper = min(upper * 2, max_length)
+        f_upper = miss(upper)
+
+    root = solve_bracketed(miss, lower, upper, f_lower, f_upper, xtol=length_tolerance)
+    length = root.x
+    if length not in solutions:
+        miss(length)
+    solution = solutions[length]
+
+    results = {
+        "Required Length": f"{length:.3f} m",
+        "Warm Fluid Outlet Temp": f"{solution.warm_outlet - DEG_C_TO_K:.2f} °C",
+        "Cool Fluid Outlet Temp": f"{solution.cool_outlet - DEG_C_TO_K:.2f} °C",
+        "Exchanger Coefficient": f"{solution.U_o:.2f}",
+        "Heat Transfer Rate": f"{solution.q:.2f} W",
+        "Evaluations": f"{len(solutions)}",
+        "Iterations": f"{driver.summary()['iterations']}",
+    }
+    return results
+
+# Node spacing of the property curves interpolated by the segment model, K
+PROPERTY_STEP_K = 0.25
+
+
+def property_curve(fluid, T_low, T_high, P, backend=None, step=PROPERTY_STEP_K):
+    """Properties of a fluid at pressure P (Pa) tabulated from T_low to T_high (K).
+
+    The nodes are at most step apart and evaluated once through the array
+    path. Returns a function of a temperature array that interpolates them
+    linearly, clamping outside the range, into a FluidProperties of arrays.
+    """
+    T_nodes = np.linspace(T_low, T_high, max(int(np.ceil((T_high - T_low) / step)), 1) + 1)
+    nodes = fluid_props_array(fluid, T_nodes, np.full(T_nodes.shape, float(P)), backend)
+
+    def props(T):
+        return FluidProperties(*(np.interp(T, T_nodes, values) for values in nodes))
+    return props
+
+
+class DoublePipeProfile(NamedTuple):
+    """Axial profiles of a segmented double-pipe solution, from the warm inlet."""
+    x: np.ndarray       # Node positions, m (segments + 1)
+    warm: np.ndarray    # Warm fluid temperature at the nodes, °C
+    cool: np.ndarray    # Cool fluid temperature at the nodes, °C
+    U: np.ndarray       # Overall coefficient of each segment, W/m^2-K
+    q: np.ndarray       # Heat transferred in each segment, W
+
+
+def march_segments(Temp1, temp1, C_w, C_c, UA):
+    """Counterflow node temperatures (K) for fixed per-segment C_w, C_c and UA.
+
+    Within a segment the difference theta = T - t decays exponentially, so
+    the segments chain through a cumulative product and the cool-inlet
+    boundary condition closes in one step; no loop over segments is needed.
+    Returns (warm node temperatures, cool node temperatures, segment duties).
+    """
+    a = 1 / C_w - 1 / C_c
+    decay = np.exp(-UA * a)                 # theta(out) / theta(in) of each segment
+    transfer = UA.copy()                    # q / theta(in) of each segment, UA when a = 0
+    np.divide(-np.expm1(-UA * a), a, out=transfer, where=a != 0)
+
+    # theta at the start of each segment, relative to the warm-inlet end
+    theta_share = np.concatenate(([1.0], np.cumprod(decay[:-1])))
+    share = theta_share * transfer
+    theta0 = (Temp1 - temp1) / (1 + np.sum(share / C_c))
+    q = theta0 * share
+
+    T = Temp1 - np.concatenate(([0.0], np.cumsum(q / C_w)))
+    t = temp1 + np.concatenate((np.cumsum((q / C_c)[::-1])[::-1], [0.0]))
+    return T, t, q
+
+
+@solver_scope
+def calculate_dphx_segmented(
+        length, material, nominal_dia_inner, nominal_dia_outer,
+        fluid1, fluid1_inlet_temp, fluid1_mass_flow,
+        fluid2, fluid2_inlet_temp, fluid2_mass_flow, schedule, ptype, segments=1000, backend=None,
+        tolerance=DEFAULT_TOLERANCE_K, max_iterations=DEFAULT_MAX_ITERATIONS,
+        initial_state=None, return_state=False, return_profile=False, driver=None,
+        property_step=PROPERTY_STEP_K):
+    """Double-pipe exchanger marched over segments with local properties.
+
+    The length is split into equal segments. Each gets properties at its own
+    mean temperatures, its own h_i, h_o and U, and the exact counterflow
+    solution for that segment. Whole temperature profiles are iterated by
+    driver until no node changes by more than its tolerance (K).
+
+    The pressure is uniform and every temperature lies between the inlets,
+    so by default each fluid's properties are evaluated once per solve on a
+    property_curve() with nodes property_step (K) apart and interpolated
+    per segment. With the default HEOS backend and water between 20 and
+    80 °C, 1000 segments then take about 0.03 s instead of 0.4 s for one
+    flash per segment per iteration, and the duty changes by about 1e-6
+    relative. property_step=None evaluates every segment through the
+    backend's array path.
+
+    initial_state / return_state work as in calculate_dphx; with
+    return_profile=True a DoublePipeProfile is returned after the results
+    (and state).
+    """
+    segments = int(segments)
+    if segments < 1:
+        raise ValueError(f"Number of segments must be at least 1, got {segments}")
+
+    geometry = dphx_geometry(length, material, nominal_dia_inner, nominal_dia_outer, schedule, ptype)
+    warm_fluid, Temp1, m_w, cool_fluid, temp1, m_c = assign_fluids(
+        fluid1, fluid1_inlet_temp, fluid1_mass_flow, fluid2, fluid2_inlet_temp, fluid2_mass_flow)
+    warm_in = warm_in_pipe(geometry, m_w, m_c)
+
+    UA_share = geometry.A_o / segments     # heat transfer area of one segment
+    P = np.full(segments, float(pressure_pa))
+
+    try:
+        if property_step is None:
+            warm_props = lambda T: fluid_props_array(warm_fluid, T, P, backend)
+            cool_props = lambda t: fluid_props_array(cool_fluid, t, P, backend)
+        else:
+            warm_props = property_curve(warm_fluid, temp1, Temp1, pressure_pa, backend, property_step)
+            cool_props = property_curve(cool_fluid, temp1, Temp1, pressure_pa, backend, property_step)
+    except ValueError as e:
+        raise ValueError(f"CoolProp Error: {e}. Check fluid names and temperature/pressure ranges.")
+
+    # Values from the latest evaluation, used after convergence
+    evaluation = {}
+
+    def profiles(nodes):
+        """Node temperatures (K) implied by properties at the current segment means."""
+        T, t = nodes[:segments + 1], nodes[segments + 1:]
+        try:
+            warm = warm_props((T[:-1] + T[1:]) * 0.5)
+            cool = cool_props((t[:-1] + t[1:]) * 0.5)
+        except ValueError as e:
+            raise ValueError(f"CoolProp Error: {e}. Check fluid names and temperature/pressure ranges.")
+
+        U = overall_coefficient(geometry, warm_in, m_w, m_c, warm, cool)
+        T_new, t_new, q = march_segments(Temp1, temp1, m_w * warm.cp, m_c * cool.cp, U * UA_share)
+        evaluation.update(U=U, q=q)
+        return np.concatenate((T_new, t_new))
+
+    if driver is None:
+        driver = IterationDriver(tolerance, max_iterations)
+
+    # Linear profiles between the inlets and the guessed outlets (K)
+    if initial_state is None:
+        T_mid = (Temp1 + temp1) * 0.5
+        initial_state = OutletState(T_mid, T_mid)
+    fraction = np.linspace(0.0, 1.0, segments + 1)
+    start = np.concatenate((Temp1 + (initial_state.warm_outlet - Temp1) * fraction,
+                            initial_state.cool_outlet + (temp1 - initial_state.cool_outlet) * fraction))
+    solution = driver.solve(profiles, start)
+    T, t = solution.x[:segments + 1], solution.x[segments + 1:]
+    U = evaluation["U"]
+    q = evaluation["q"]
+
+    Temp2 = float(T[-1])
+    temp2 = float(t[0])
+    q_total = float(np.sum(q))
+    U_mean = float(np.mean(U))
+
+    results = {
+        "Warm Fluid Outlet Temp": f"{Temp2 - DEG_C_TO_K:.2f} °C",
+        "Cool Fluid Outlet Temp": f"{temp2 - DEG_C_TO_K:.2f} °C",
+        "Exchanger Coefficient": f"{U_mean:.2f}",
+        "Heat Transfer Rate": f"{q_total:.2f} W",
+        "Segments": f"{segments}",
+        "Iterations": f"{solution.iterations}",
+        "Residual": f"{solution.residual:.2e} K",
     }
-    return results
\ No newline at end of file
+    returned = (results,)
+    if return_state:
+        returned += (OutletState(Temp2, temp2),)
+    if return_profile:
+        x = np.linspace(0.0, geometry.length, segments + 1)
+        returned += (DoublePipeProfile(x, T - DEG_C_TO_K, t - DEG_C_TO_K, U, q),)
+    return returned if len(returned) > 1 else results
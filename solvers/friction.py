@@ -0,0 +1,71 @@
+"""
+Darcy friction factor for pipe flow.
+
+friction_factor() takes scalars or arrays of Reynolds number and relative
+roughness. Laminar flow uses 64/Re. Turbulent flow solves the implicit
+Colebrook-White equation
+
+    1/sqrt(f) = -2 log10(eps/3.7 + 2.51 / (Re sqrt(f)))
+
+by Newton's method in x = 1/sqrt(f), seeded with the explicit Haaland
+correlation. The seed is within a few percent, so three or four Newton
+steps bring the whole array to machine precision.
+"""
+
+import numpy as np
+
+LAMINAR_RE = 2300       # transition Reynolds number
+NEWTON_TOLERANCE = 1e-12
+NEWTON_MAX_ITERATIONS = 20
+
+_LN10 = np.log(10.0)
+
+
+def haaland(re, rel_roughness):
+    """Explicit Haaland approximation of the Colebrook friction factor."""
+    re = np.asarray(re, dtype=float)
+    rel_roughness = np.asarray(rel_roughness, dtype=float)
+    return (-1.8 * np.log10((rel_roughness / 3.7)**1.11 + 6.9 / re))**-2
+
+
+def colebrook(re, rel_roughness):
+    """Colebrook-White friction factor (turbulent flow) for arrays of Re and eps/D."""
+    re, rel_roughness = np.broadcast_arrays(np.asarray(re, dtype=float), np.asarray(rel_roughness, dtype=float))
+    a = rel_roughness / 3.7
+    b = 2.51 / re
+
+    x = 1 / np.sqrt(haaland(re, rel_roughness))
+    for _ in range(NEWTON_MAX_ITERATIONS):
+        inner = a + b * x
+        residual = x + 2 * np.log10(inner)
+        step = residual / (1 + 2 * b / (inner * _LN10))
+        x = x - step
+        if np.all(np.abs(step) <= NEWTON_TOLERANCE * x):
+            break
+    else:
+        raise ValueError("Colebrook friction factor did not converge")
+    return 1 / x**2
+
+
+def friction_factor(re, rel_roughness, laminar_re=LAMINAR_RE):
+    """Darcy friction factor: 64/Re below laminar_re, Colebrook-White above.
+
+    Accepts scalars or broadcastable arrays; returns a float for scalar input.
+    """
+    re_array, rough_array = np.broadcast_arrays(np.asarray(re, dtype=float),
+                                                np.asarray(rel_roughness, dtype=float))
+    if np.any(~(re_array > 0)):
+        raise ValueError("Reynolds number must be positive to compute a friction factor")
+    if np.any(rough_array < 0):
+        raise ValueError("Relative roughness cannot be negative")
+
+    laminar = re_array < laminar_re
+    f = np.empty(re_array.shape)
+    f[laminar] = 64 / re_array[laminar]
+    turbulent = ~laminar
+    if np.any(turbulent):
+        f[turbulent] = colebrook(re_array[turbulent], rough_array[turbulent])
+
+    if f.ndim == 0:
+        return float(f)
+    return f
@@ -1,11 +1,13 @@
 import numpy as np
-from CoolProp.CoolProp import PropsSI
+from solvers.properties import solver_scope
+from solvers.saturation import saturation_curve
 
 # Conversion Factors
 DEG_C_TO_K = 273.15
 DEG_F_TO_K = lambda F: (F - 32) * 5/9 + DEG_C_TO_K
 IN_TO_M = 0.0254
 
+@solver_scope
 def calculate_heatpipe(evap_len, adia_len, cond_len, vapor_diam, wick_material, mesh, wire_diam, layers, working_fluid, op_temp, unit_system):
 
     # Take user inputs
@@ -52,20 +54,19 @@ def calculate_heatpipe(evap_len, adia_len, cond_len, vapor_diam, wick_material,
     # Effective length
     l_eff = (l_evap_m / 2) + l_adia_m + (l_cond_m / 2)
 
-    # Find fluid properties using CoolProp
-    pv = PropsSI('P', 'T', op_temp_k, 'Q', 1, working_fluid_input) # Vapor pressure
-    hf = PropsSI('Hmass', 'T', op_temp_k, 'Q', 0, working_fluid_input) # Liquid enthalpy
-    hg = PropsSI('Hmass', 'T', op_temp_k, 'Q', 1, working_fluid_input) # Vapor enthalpy
-    hfg = hg - hf # Latent heat of vaporization
+    # Find saturation properties from the cached saturation curve
+    sat = saturation_curve(working_fluid_input).at_T(op_temp_k)
+    pv = sat.P # Vapor pressure
+    hfg = sat.hfg # Latent heat of vaporization
 
-    rhol = PropsSI('D', 'T', op_temp_k, 'Q', 0, working_fluid_input) # Liquid density
-    rhov = PropsSI('D', 'T', op_temp_k, 'Q', 1, working_fluid_input) # Vapor density
-    mul = PropsSI('V', 'T', op_temp_k, 'Q', 0, working_fluid_input) # Liquid dynamic viscosity
-    muv = PropsSI('V', 'T', op_temp_k, 'Q', 1, working_fluid_input) # Vapor dynamic viscosity
+    rhol = sat.rho_l # Liquid density
+    rhov = sat.rho_v # Vapor density
+    mul = sat.mu_l # Liquid dynamic viscosity
+    muv = sat.mu_v # Vapor dynamic viscosity
 
-    sigma = PropsSI('I', 'T', op_temp_k, 'Q', 0, working_fluid_input) # Surface tension
+    sigma = sat.sigma # Surface tension
 
-    k_l = PropsSI('L', 'T', op_temp_k, 'Q', 0, working_fluid_input) # Liquid thermal conductivity
+    k_l = sat.k_l # Liquid thermal conductivity
 
     # Find wick thermal conductivity based on material
     if wick_material_input == "Stainless Steel Screen":
@@ -1,6 +1,12 @@
-import pandas as pd
-from pathlib import Path
 import numpy as np
+from solvers.catalog import fluid_constants, pipe_dimensions
+from solvers.friction import friction_factor as darcy_friction_factor
+from solvers.properties import solver_scope
+
+# Conversion Factors (catalog values are SI)
+M_TO_FT = 1 / 0.3048
+KG_M3_TO_LB_FT3 = 0.0624279606
+PA_S_TO_LBF_S_FT2 = 0.0208854342
 
 # Helper function for input validation
 def validate_input(value, name, check_positive=True):
@@ -15,55 +21,7 @@ def validate_input(value, name, check_positive=True):
     except ValueError:
         raise ValueError(f"Invalid numeric input for '{name}': {value}")
 
-def get_piping_dimensions(material, nominal_dia, schedule=None, ptype=None):
-    BASE_PATH = Path(__file__).parent.parent
-    PIPE_DIMENSIONS_PATH = BASE_PATH / "tables" / "pipe_dimensions.csv"
-    COPPER_TUBING_PATH = BASE_PATH / "tables" / "seamless_copper_tubing.csv"
-
-    try:
-        if "Copper" in material:
-            properties = pd.read_csv(COPPER_TUBING_PATH)
-            if not ptype:
-                 raise ValueError("Copper pipe type (K, L, M) must be selected.")
-            pipe_type = ptype.split(" ")
-            pipe_data = properties.loc[
-                (properties["Standard Size in"] == nominal_dia) &
-                (properties["Type"] == pipe_type[-1])
-            ]
-        else:  # Material is steel
-            properties = pd.read_csv(PIPE_DIMENSIONS_PATH)
-            if not schedule:
-                raise ValueError("Steel pipe schedule must be selected.")
-            pipe_data = properties.loc[
-                (properties["Nominal Diameter in"] == nominal_dia) &
-                (properties["Schedule"] == schedule)
-            ]
-
-        if pipe_data.empty:
-            raise ValueError(f"Pipe dimensions not found for: Material='{material}', Dia='{nominal_dia}', Schedule='{schedule}', Type='{ptype}'.")
-
-        return pipe_data.iloc[0].to_dict()
-
-    except FileNotFoundError:
-        raise FileNotFoundError("Error: Pipe dimensions CSV file not found.")
-    except Exception as e:
-        raise Exception(f"Error reading pipe dimensions: {e}")
-
-
-def get_fluid_properties(fluid):
-    BASE_PATH = Path(__file__).parent.parent
-    PROPERTIES_PATH = BASE_PATH / "tables" / "fluidpropertiesdensityvisc.csv"
-    try:
-        properties = pd.read_csv(PROPERTIES_PATH)
-        fluid_data = properties.loc[properties["Substance"] == fluid]
-        if fluid_data.empty:
-            raise ValueError(f"Fluid properties not found for '{fluid}'.")
-        return fluid_data.iloc[0].to_dict()
-    except FileNotFoundError:
-        raise FileNotFoundError("Error: Fluid properties CSV file not found.")
-    except Exception as e:
-        raise Exception(f"Error reading fluid properties: {e}")
-
+@solver_scope
 def calculate_piping(length, material, nominal_dia, fluid, fluid_flow, schedule=None, ptype=None, unit_system="SI"):
     try:
         # --- Input Validation ---
@@ -71,23 +29,21 @@ def calculate_piping(length, material, nominal_dia, fluid, fluid_flow, schedule=
         fluid_flow_val = validate_input(fluid_flow, "Fluid Flow Rate")
         # Material, nominal_dia, fluid, schedule, ptype are validated during lookup
 
-        # --- Get Properties (wrapped in try...except in helper functions) ---
-        pipe_dims = get_piping_dimensions(material, nominal_dia, schedule, ptype)
-        fluid_props = get_fluid_properties(fluid)
+        # --- Get Properties (catalog lookups raise ValueError when not found) ---
+        pipe_dims = pipe_dimensions(material, nominal_dia, schedule, ptype)
+        fluid_data = fluid_constants(fluid)
 
         # --- Calculations ---
         # Gather initial values based on unit system
         if unit_system == "SI":
-            inside_diameter_cm = validate_input(pipe_dims.get('Inside Diameter cm'), "Inside Diameter (from CSV)")
-            inside_diameter_std = inside_diameter_cm / 100
-            flow_area_cm2 = validate_input(pipe_dims.get('Flow Area cm^2'), "Flow Area (from CSV)")
-            flow_area_std = flow_area_cm2 / 10000
+            inside_diameter_std = pipe_dims.id
+            flow_area_std = pipe_dims.flow_area
             dia_unit = "cm"
             area_unit = "cm²"
 
-            fluid_density = validate_input(fluid_props.get('Density (kg/m³)', None), f"Density for {fluid}")
+            fluid_density = fluid_data.rho
             density_unit = "kg/m³"
-            fluid_viscosity = validate_input(fluid_props.get('Dynamic Viscosity (Pa·s)', None), f"Viscosity for {fluid}")
+            fluid_viscosity = fluid_data.mu
             viscosity_unit = "Pa·s"
 
             if material == "Steel": epsilon_mm = 0.046 # Updated based on common values
@@ -98,16 +54,14 @@ def calculate_piping(length, material, nominal_dia, fluid, fluid_flow, schedule=
             pressure_unit = "kPa"
 
         else:  # Imperial
-            inside_diameter_ft = validate_input(pipe_dims.get('Inside Diameter ft'), "Inside Diameter (from CSV)")
-            inside_diameter_std = inside_diameter_ft
-            flow_area_ft2 = validate_input(pipe_dims.get('Flow Area ft^2'), "Flow Area (from CSV)")
-            flow_area_std = flow_area_ft2
+            inside_diameter_std = pipe_dims.id * M_TO_FT
+            flow_area_std = pipe_dims.flow_area * M_TO_FT**2
             dia_unit = "ft"
             area_unit = "ft²"
 
-            fluid_density = validate_input(fluid_props.get('Density (lb/ft³)', None), f"Density for {fluid}")
+            fluid_density = fluid_data.rho * KG_M3_TO_LB_FT3
             density_unit = "lb/ft³"
-            fluid_viscosity = validate_input(fluid_props.get('Dynamic Viscosity (lb·s/ft²)', None), f"Viscosity for {fluid}")
+            fluid_viscosity = fluid_data.mu * PA_S_TO_LBF_S_FT2
             viscosity_unit = "lb·s/ft²"
 
             if material == "Steel": epsilon_in = 0.0018 # in
@@ -117,14 +71,6 @@ def calculate_piping(length, material, nominal_dia, fluid, fluid_flow, schedule=
             roughness_unit = "in"
             pressure_unit = "psi" # Changed from ksi to psi
 
-        error = 1.0
-        friction_factor = 0.02 # Initial guess
-
-        # Iteration setup
-        max_iterations = 100
-        tolerance = 0.005 # Stricter tolerance
-        iteration = 0
-
         if flow_area_std <= 1e-9: # Avoid division by zero
              raise ValueError("Pipe flow area is too small or zero.")
 
@@ -139,32 +85,8 @@ def calculate_piping(length, material, nominal_dia, fluid, fluid_flow, schedule=
             raise ValueError("Fluid viscosity is zero, cannot calculate Reynolds number.")
         re = abs((fluid_density * velocity * inside_diameter_std) / fluid_viscosity) # Use abs for Re
 
-        while error > tolerance and iteration < max_iterations:
-            iteration += 1
-            # Calculate friction factor
-            if re < 2300: # Use 2300 for transition Reynolds number
-                friction_factor_new = 64 / re
-            else:
-                rel_roughness = epsilon / inside_diameter_std
-                # Explicit Colebrook equation (using Haaland as initial guess for iterative solver if needed, but direct Haaland is often sufficient)
-                # Using Haaland directly for simplicity here:
-                term1 = (rel_roughness / 3.7)**1.11
-                term2 = 6.9 / re
-                try:
-                    friction_factor_new = (-1.8 * np.log10(term1 + term2))**-2
-                except ValueError:
-                     raise ValueError("Calculation error: Invalid value in friction factor logarithm.")
-
-
-            if friction_factor > 1e-9: # Avoid division by zero if ff is near zero
-                error = abs(friction_factor_new - friction_factor) / friction_factor
-            else:
-                error = 0 # Converged if ff is zero
-
-            friction_factor = friction_factor_new
-
-            if iteration == max_iterations:
-                print("Warning: Max iterations reached for friction factor calculation.")
+        # Darcy friction factor: 64/Re when laminar, full Colebrook-White when turbulent
+        friction_factor = darcy_friction_factor(re, epsilon / inside_diameter_std)
 
         # Calculate pressure drop
         del_p_std_units = ((friction_factor * length_val) / inside_diameter_std) * ((fluid_density * velocity**2) / 2)
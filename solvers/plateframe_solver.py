@@ -1,13 +1,61 @@
 import numpy as np
-import pandas as pd
-from pathlib import Path
-from solvers.waterinterpolator import WaterInterp
-from CoolProp.CoolProp import PropsSI
+from typing import NamedTuple
+from solvers.convergence import DEFAULT_MAX_ITERATIONS, DEFAULT_TOLERANCE_K, IterationDriver, OutletState
+from solvers.properties import fluid_props, fluid_props_array, solver_scope
 
 pressure_pa = 101325
 
+# Plate properties
+PLATE_SPACING = .0048       # plate spacing, m
+PLATE_THICKNESS = .001      # plate thickness, m
+PLATE_CONDUCTIVITY = 13     # thermal conductivity of plate (stainless steel 316SS), W/m-K
+
+# fouling factors
+R_DI = 3.52e-6
+R_DO = 3.52e-6
+
+
+def plate_nusselt(Re, pr, D_h, Len):
+    """Channel Nusselt number, laminar below Re = 100 (scalars or arrays)."""
+    return np.where(Re < 100, 1.86*(D_h * Re * pr / Len) ** (1/3), .374 * Re ** 0.668 * pr ** (1/3))
+
+
+def plate_friction(Re):
+    """Channel friction factor (scalars or arrays)."""
+    return np.where(Re < 10, 280/Re, np.where(Re < 100, 100 / Re ** 0.589, 12 / Re ** 0.183))
+
+
+def plate_count(plates):
+    """Number of thermal plates as an int, rejecting non-positive input."""
+    N_s = int(float(plates))
+    if N_s < 1:
+        raise ValueError(f"Number of plates must be at least 1, got {plates}")
+    return N_s
+
+
+def channel_counts(N_s, m_w_greater):
+    """Channels per fluid; the larger mass flow gets the extra channel when N_s is even."""
+    if (N_s % 2) == 1:          # if Ns is odd
+        return (N_s + 1) / 2, (N_s + 1) / 2
+    elif m_w_greater:
+        return (N_s + 2) / 2, N_s / 2
+    return N_s / 2, (N_s + 2) / 2
+
+@solver_scope
 def calculate_plateframe(plates, length, width, hot_fluid, hot_fluid_inlet_temp, hot_fluid_mass_flow, 
-                         cold_fluid, cold_fluid_inlet_temp, cold_fluid_mass_flow):
+                         cold_fluid, cold_fluid_inlet_temp, cold_fluid_mass_flow, backend=None,
+                         tolerance=DEFAULT_TOLERANCE_K, max_iterations=DEFAULT_MAX_ITERATIONS,
+                         initial_state=None, return_state=False, driver=None):
+    """Plate-and-frame exchanger outlet temperatures, U, duty and pressure drops.
+
+    All channels of a fluid share one bulk model. The outlet temperatures
+    are iterated by driver (an IterationDriver, by default one built from
+    tolerance and max_iterations) until they change by less than its
+    tolerance (K); ConvergenceError is raised after max_iterations. The
+    iteration starts from initial_state (an OutletState) when given, else
+    from the midpoint of the inlets. With return_state=True the converged
+    OutletState is returned after the results dict.
+    """
 
     ## Givens
 
@@ -20,78 +68,39 @@ def calculate_plateframe(plates, length, width, hot_fluid, hot_fluid_inlet_temp,
     temp1 = float(cold_fluid_inlet_temp)                 # inlet temp of cooler fluid
 
     # plate dimensions and properties
-    b = .6       # plate width
-    Len = 1       # plate height
-    s = .0048       # plate spacing
-    t = .001       # plate thickness
-    N_s = 15         # number of plates
-    k = 13       # thermal conductivity of plate
-
-    Plate_material = "stainless steel (316SS)"        # plate material
+    b = float(width)       # plate width
+    Len = float(length)       # plate height
+    s = PLATE_SPACING       # plate spacing
+    t = PLATE_THICKNESS       # plate thickness
+    N_s = plate_count(plates)         # number of plates
+    k = PLATE_CONDUCTIVITY       # thermal conductivity of plate
 
-    # fouling factors
+    ## Plate Dimensions and Properties (independent of temperature)
 
-    R_di = 3.52e-6
-    R_do = 3.52e-6
+    A_o = b * Len     # plate surface area
+    Flow_Area = s * b    # flow area
+    D_h = 2 * s     # hydraulic flow
 
-    ## Fluid Properties
-    wiswater = True            # check if warm fluid is water
-    ciswater = True            # check if cool fluid is water
+    ## Channels per fluid (the larger mass flow gets the extra channel when Ns is even)
+    channels_w, channels_c = channel_counts(N_s, m_w > m_c)
 
-    m_w_greater = False        # assume m_w as smaller mass flow
+    # Values from the latest evaluation, used after convergence
+    evaluation = {}
 
-    if m_w > m_c:                # verify
-        m_w_greater = True     # correction 
-    
-    t_loop = True
-
-    Temp2 = (Temp1 + temp1) * .5        # initial guess Temp2
-    temp2 = (Temp1 + temp1) * .5       # initial guess temp2
-
-    while t_loop == True:
+    def outlet_temps(outlets):
+        """Outlet temperatures (°C) implied by properties at the mean of inlet and guessed outlet."""
+        Temp2, temp2 = outlets
 
         Tavg = (Temp1 + Temp2) * .5 + 273.15     # Tavg based on Temp1 and Temp2
         tavg = (temp1 + temp2) * .5 + 273.15     # tavg based on temp1 and temp2
 
-        if wiswater == True:
-            rho_w = PropsSI('D', 'T', Tavg, 'P', pressure_pa, 'Water')    # Density
-            k_w = PropsSI('L', 'T', Tavg, 'P', pressure_pa, 'Water')       # Thermal Conductivity
-            cp_w = PropsSI('Cpmass', 'T', Tavg, 'P', pressure_pa, 'Water') # Specific Heat
-            mu_w = PropsSI('V', 'T', Tavg, 'P', pressure_pa, 'Water')      # Dynamic Viscosity
-            pr_w = PropsSI('Prandtl', 'T', Tavg, 'Q', 0, 'Water')       # Prandtl Number
-            nu_w = mu_w / rho_w                  # Kinematic Viscosity
-            
-
-        if ciswater == True:
-            rho_c = PropsSI('D', 'T', tavg, 'P', pressure_pa, 'Water')    # Density
-            k_c = PropsSI('L', 'T', tavg, 'P', pressure_pa, 'Water')       # Thermal Conductivity
-            cp_c = PropsSI('Cpmass', 'T', tavg, 'P', pressure_pa, 'Water') # Specific Heat
-            mu_c = PropsSI('V', 'T', tavg, 'P', pressure_pa, 'Water')      # Dynamic Viscosity
-            pr_c = PropsSI('Prandtl', 'T', tavg, 'Q', 0, 'Water')       # Prandtl Number
-            nu_c = mu_c / rho_c                  # Kinematic Viscosity
-        
-    
-
-        ## Plate Dimensions and Properties
-
-        A_o = b * Len     # plate surface area
-        Flow_Area = s * b    # flow area
-        D_h = 2 * s     # hydraulic flow
+        rho_w, cp_w, k_w, mu_w, pr_w, nu_w = fluid_props(hot_fluid, Tavg, pressure_pa, backend)    # Properties at Tavg
+        rho_c, cp_c, k_c, mu_c, pr_c, nu_c = fluid_props(cold_fluid, tavg, pressure_pa, backend)    # Properties at tavg
 
         ## Fluid Velocities
 
-        if (N_s % 2) == 1:          # if Ns is odd
-            V_w = m_w/(rho_w*Flow_Area)/((N_s + 1)/2)     # velocity warm
-            V_c = m_c/(rho_c*Flow_Area)/((N_s + 1)/2)     # velocity cool
-        else:
-            if m_w_greater:
-                V_w = m_w/(rho_w*Flow_Area)/((N_s + 2)/2)     # velocity warm
-                V_c = m_c/(rho_c*Flow_Area)/((N_s)/2)     # velocity cool
-            else:
-                V_c = m_c/(rho_c*Flow_Area)/((N_s + 2)/2)     # velocity warm
-                V_w = m_w/(rho_w*Flow_Area)/((N_s)/2)     # velocity cool
-            
-        
+        V_w = m_w/(rho_w*Flow_Area)/channels_w     # velocity warm
+        V_c = m_c/(rho_c*Flow_Area)/channels_c     # velocity cool
 
         ## Reynold's Numbers
 
@@ -100,17 +109,8 @@ def calculate_plateframe(plates, length, width, hot_fluid, hot_fluid_inlet_temp,
 
         ## Nusselt Numbers
 
-        if Re_w < 100:
-            Nu_w = 1.86*(D_h * Re_w * pr_w / Len) ** (1/3) # Warm Nusselt
-        else:
-            Nu_w = .374 * Re_w ** 0.668 * pr_w ** (1/3)  # Cool Nusselt
-        
-
-        if Re_c < 100:
-            Nu_c = 1.86*(D_h * Re_c * pr_c / Len) ** (1/3) # Warm Nusselt
-        else:
-            Nu_c = .374 * Re_c ** 0.668 * pr_c ** (1/3)  # Cool Nusselt
-        
+        Nu_w = float(plate_nusselt(Re_w, pr_w, D_h, Len))  # Warm Nusselt
+        Nu_c = float(plate_nusselt(Re_c, pr_c, D_h, Len))  # Cool Nusselt
 
         ## Convection Coefficients
         h_i = Nu_w * k_w / D_h        # inner wall convection coefficient
@@ -136,24 +136,36 @@ def calculate_plateframe(plates, length, width, hot_fluid, hot_fluid_inlet_temp,
 
         E_counter = np.exp(U_o * A_o * N_s * F_factor * (R_factor-1) / h_cap_c)
 
-        Temp2_o = Temp2
-        temp2_o = temp2
+        evaluation.update(rho_w=rho_w, rho_c=rho_c, V_w=V_w, V_c=V_c, Re_w=Re_w, Re_c=Re_c, U_o=U_o,
+                          h_cap_w=h_cap_w, h_cap_c=h_cap_c, F_factor=F_factor)
 
-        Temp2 = (Temp1 * (R_factor - 1) - R_factor * temp1 * (1-E_counter)) / (R_factor * E_counter - 1)
+        Temp2_new = (Temp1 * (R_factor - 1) - R_factor * temp1 * (1-E_counter)) / (R_factor * E_counter - 1)
+        temp2_new = (Temp1 - Temp2) / R_factor + temp1
+        return (Temp2_new, temp2_new)
 
-        temp2 = (Temp1 - Temp2_o) / R_factor + temp1
+    if driver is None:
+        driver = IterationDriver(tolerance, max_iterations)
 
-        Tavg = (Temp1 + Temp2)/ 2
-        tavg = (temp1 + temp2)/ 2
-        
-        print(temp2_o)
-        print(temp2)
-
-        T_error = abs((Temp2 - Temp2_o)/Temp2_o)
-        t_error = abs((temp2 - temp2_o)/temp2_o)
-
-        if (T_error < 0.0005) & (t_error < 0.0005):
-            t_loop = False
+    # Fixed-point iteration on the outlet temperatures (°C),
+    # starting from the midpoint of the inlets unless warm-started
+    if initial_state is None:
+        T_mid = (Temp1 + temp1) * .5
+        start = (T_mid, T_mid)
+    else:
+        start = (initial_state.warm_outlet - 273.15, initial_state.cool_outlet - 273.15)
+    solution = driver.solve(outlet_temps, start)
+    Temp2, temp2 = solution.x
+
+    rho_w = evaluation["rho_w"]
+    rho_c = evaluation["rho_c"]
+    V_w = evaluation["V_w"]
+    V_c = evaluation["V_c"]
+    Re_w = evaluation["Re_w"]
+    Re_c = evaluation["Re_c"]
+    U_o = evaluation["U_o"]
+    h_cap_w = evaluation["h_cap_w"]
+    h_cap_c = evaluation["h_cap_c"]
+    F_factor = evaluation["F_factor"]
 
     ## Log Mean Temperature Diffference
 
@@ -170,7 +182,7 @@ def calculate_plateframe(plates, length, width, hot_fluid, hot_fluid_inlet_temp,
 
     ## Fouling Factors and Design Coefficient
 
-    U = (1/U_o + R_di + R_do) ** -1
+    U = (1/U_o + R_DI + R_DO) ** -1
 
     ## Area Required to Transfer Heat (Determination of Plate Area)
 
@@ -178,25 +190,8 @@ def calculate_plateframe(plates, length, width, hot_fluid, hot_fluid_inlet_temp,
 
     ## Friction Factors
 
-    if Re_w < 10:
-        f_w = 280/Re_w
-    else:
-        if Re_w < 100:
-            f_w = 100 / Re_w ** 0.589
-        else:
-            f_w = 12 / Re_w ** 0.183
-        
-    
-
-    if Re_c < 10:
-        f_c = 280/Re_c
-    else:
-        if Re_c < 100:
-            f_c = 100 / Re_c ** 0.589
-        else:
-            f_c = 12 / Re_c ** 0.183
-        
-    
+    f_w = float(plate_friction(Re_w))
+    f_c = float(plate_friction(Re_c))
 
     ## Pressure Drop Calculations (V_p = 0)
     V_p = 0
@@ -204,7 +199,7 @@ def calculate_plateframe(plates, length, width, hot_fluid, hot_fluid_inlet_temp,
     deltaP_c = f_c * Len * rho_c * V_c**2 / (D_h * 2) + (1.3 * rho_c * V_p)/2
 
     # Unit conversion for nicer print
-    q_o = -(q_o / 10000)
+    q_o = -(q_o / 1000)
     deltaP_w = deltaP_w / 1000
     deltaP_c = deltaP_c / 1000
 
@@ -215,5 +210,183 @@ def calculate_plateframe(plates, length, width, hot_fluid, hot_fluid_inlet_temp,
         "Cool Fluid Outlet Temperature": f"{temp2:.2f} °C",
         "Warm Fluid Pressure Drop": f"{deltaP_w:.2f} kPa",
         "Cool Fluid Pressure Drop": f"{deltaP_c:.2f} kPa",
+        "Iterations": f"{solution.iterations}",
+        "Residual": f"{solution.residual:.2e} K",
+    }
+    if return_state:
+        return results, OutletState(float(Temp2) + 273.15, float(temp2) + 273.15)
+    return results
+
+class PlateChannelProfile(NamedTuple):
+    """Channel-resolved plate-and-frame solution, channels in pack order."""
+    hot: np.ndarray         # True for warm-fluid channels
+    mass_flow: np.ndarray   # Flow split, kg/s per channel
+    mean_temp: np.ndarray   # Channel mean temperature, °C
+    outlet_temp: np.ndarray # Channel outlet temperature, °C
+    x: np.ndarray           # Cell face positions along the plate, m
+    temps: np.ndarray       # Face temperatures, °C, shape (channels, cells + 1)
+    U: np.ndarray           # Overall coefficient across each plate, W/m^2-K
+    pressure_drop: np.ndarray   # Channel pressure drop, kPa
+
+
+def solve_plate_pack(hot, C, G, T_in, cells):
+    """Face temperatures (channels, cells + 1) of a counterflow plate pack.
+
+    Warm channels flow towards +x and cool channels towards -x. C holds the
+    channel heat capacitances and G the conductance U*A of each plate (one
+    fewer than the channels). Each cell balances C (T_out - T_in) against
+    the plate heat flows at the cell mean temperatures, giving a block
+    tridiagonal system in the channels that is eliminated block by block.
+    """
+    n = len(C)
+    faces = cells + 1
+    sign = np.where(hot, 1.0, -1.0)
+    g = G / cells       # conductance of one plate cell
+
+    # Neighbour coupling: the cell mean of the neighbour's faces
+    B = np.zeros((faces, faces))
+    B[np.arange(cells), np.arange(cells)] = .5
+    B[np.arange(cells), np.arange(1, faces)] = .5
+
+    g_lower = np.concatenate(([0.0], g))      # plate below each channel
+    g_upper = np.concatenate((g, [0.0]))      # plate above each channel
+    g_total = g_lower + g_upper
+
+    # Own-channel blocks: cell balances, then the inlet condition
+    D = np.zeros((n, faces, faces))
+    D[:, np.arange(cells), np.arange(cells)] = (-C * sign + g_total * .5)[:, None]
+    D[:, np.arange(cells), np.arange(1, faces)] = (C * sign + g_total * .5)[:, None]
+    inlet = np.where(hot, 0, cells)
+    D[np.arange(n), cells, inlet] = 1
+    rhs = np.zeros((n, faces))
+    rhs[:, cells] = T_in
+
+    # Forward elimination, keeping S_i^-1 [B | y_i] for the back substitution
+    kept = np.empty((n, faces, faces + 1))
+    S = D[0]
+    y = rhs[0]
+    for i in range(n):
+        if i:
+            S = D[i] - g[i - 1]**2 * B @ kept[i - 1, :, :faces]
+            y = rhs[i] + g[i - 1] * B @ kept[i - 1, :, faces]
+        kept[i] = np.linalg.solve(S, np.column_stack((B, y)))
+
+    temps = np.empty((n, faces))
+    temps[-1] = kept[-1, :, faces]
+    for i in range(n - 2, -1, -1):
+        temps[i] = kept[i, :, faces] + g[i] * kept[i, :, :faces] @ temps[i + 1]
+    return temps
+
+
+@solver_scope
+def calculate_plateframe_channels(plates, length, width, hot_fluid, hot_fluid_inlet_temp, hot_fluid_mass_flow,
+                                  cold_fluid, cold_fluid_inlet_temp, cold_fluid_mass_flow, cells=20, backend=None,
+                                  tolerance=DEFAULT_TOLERANCE_K, max_iterations=DEFAULT_MAX_ITERATIONS,
+                                  initial_state=None, return_state=False, return_profile=False, driver=None):
+    """Plate-and-frame exchanger resolved channel by channel.
+
+    The plates thermal plates separate plates + 1 channels that alternate
+    between the fluids. Every channel has its own flow split, mean
+    temperature and properties, and every plate its own U; the channels are
+    discretized into cells along the plate and solved together. The channel
+    mean temperatures are iterated by driver until they change by less than
+    its tolerance (K). initial_state / return_state work as in
+    calculate_plateframe; with return_profile=True a PlateChannelProfile is
+    returned after the results (and state).
+    """
+    m_w = float(hot_fluid_mass_flow)
+    m_c = float(cold_fluid_mass_flow)
+    Temp1 = float(hot_fluid_inlet_temp)
+    temp1 = float(cold_fluid_inlet_temp)
+
+    b = float(width)
+    Len = float(length)
+    N_s = plate_count(plates)
+    cells = int(cells)
+    if cells < 1:
+        raise ValueError(f"Number of cells must be at least 1, got {cells}")
+
+    Flow_Area = PLATE_SPACING * b
+    D_h = 2 * PLATE_SPACING
+    A_plate = b * Len
+
+    ## Channels in pack order; the fluid with more channels takes both ends
+    channels_w, channels_c = channel_counts(N_s, m_w > m_c)
+    n = N_s + 1
+    hot = (np.arange(n) % 2 == 0) if channels_w >= channels_c else (np.arange(n) % 2 == 1)
+    m = np.where(hot, m_w / channels_w, m_c / channels_c)      # uniform flow split
+    T_in = np.where(hot, Temp1, temp1)
+    P = np.full(n, float(pressure_pa))
+
+    # Values from the latest evaluation, used after convergence
+    evaluation = {}
+
+    def channel_means(means):
+        """Channel mean temperatures (°C) implied by properties at the current means."""
+        T_K = means + 273.15
+        props_w = fluid_props_array(hot_fluid, T_K[hot], P[hot], backend)
+        props_c = fluid_props_array(cold_fluid, T_K[~hot], P[~hot], backend)
+        channel = {}
+        for name in ("rho", "cp", "k", "pr", "nu"):
+            values = np.empty(n)
+            values[hot] = getattr(props_w, name)
+            values[~hot] = getattr(props_c, name)
+            channel[name] = values
+
+        V = m / (channel["rho"] * Flow_Area)
+        Re = V * D_h / channel["nu"]
+        h = plate_nusselt(Re, channel["pr"], D_h, Len) * channel["k"] / D_h
+        U = (1/h[:-1] + PLATE_THICKNESS/PLATE_CONDUCTIVITY + 1/h[1:]) ** -1
+
+        C = m * channel["cp"]
+        temps = solve_plate_pack(hot, C, U * A_plate, T_in, cells)
+        evaluation.update(rho=channel["rho"], V=V, Re=Re, U=U, C=C, temps=temps)
+
+        # Trapezoidal mean over the cell faces
+        return (temps[:, :-1] + temps[:, 1:]).mean(axis=1) * .5
+
+    if driver is None:
+        driver = IterationDriver(tolerance, max_iterations)
+
+    # Channel means between the inlets and the guessed outlets (°C)
+    if initial_state is None:
+        T_mid = (Temp1 + temp1) * .5
+        initial_state = OutletState(T_mid + 273.15, T_mid + 273.15)
+    guess_out = np.where(hot, initial_state.warm_outlet, initial_state.cool_outlet) - 273.15
+    solution = driver.solve(channel_means, (T_in + guess_out) * .5)
+
+    U = evaluation["U"]
+    C = evaluation["C"]
+    temps = evaluation["temps"]
+    rho = evaluation["rho"]
+    V = evaluation["V"]
+    Re = evaluation["Re"]
+
+    outlet = np.where(hot, temps[:, -1], temps[:, 0])
+    Temp2 = float(np.sum(C[hot] * outlet[hot]) / np.sum(C[hot]))      # mixed outlets
+    temp2 = float(np.sum(C[~hot] * outlet[~hot]) / np.sum(C[~hot]))
+    q = float(np.sum(C[hot] * (Temp1 - outlet[hot])))
+
+    ## Pressure Drop Calculations (V_p = 0)
+    deltaP = plate_friction(Re) * Len * rho * V**2 / (D_h * 2) / 1000
+    deltaP_w = float(np.mean(deltaP[hot]))
+    deltaP_c = float(np.mean(deltaP[~hot]))
+
+    results = {
+        "Exchanger Coefficient": f"{float(np.mean(U)):.2f}",
+        "Heat Transfer Rate": f"{q / 1000:.2f} kW",
+        "Warm Fluid Outlet Temperature": f"{Temp2:.2f} °C",
+        "Cool Fluid Outlet Temperature": f"{temp2:.2f} °C",
+        "Warm Fluid Pressure Drop": f"{deltaP_w:.2f} kPa",
+        "Cool Fluid Pressure Drop": f"{deltaP_c:.2f} kPa",
+        "Channels": f"{n}",
+        "Iterations": f"{solution.iterations}",
+        "Residual": f"{solution.residual:.2e} K",
     }
-    return results
\ No newline at end of file
+    returned = (results,)
+    if return_state:
+        returned += (OutletState(Temp2 + 273.15, temp2 + 273.15),)
+    if return_profile:
+        x = np.linspace(0.0, Len, cells + 1)
+        returned += (PlateChannelProfile(hot, m, solution.x, outlet, x, temps, U, deltaP),)
+    return returned if len(returned) > 1 else results
@@ -0,0 +1,475 @@
+"""
+Shared fluid property layer for the solvers.
+
+Every CoolProp lookup made by a solver goes through this module so that
+repeated states (fixed-point iterations, repeated GUI clicks, parametric
+sweeps) are answered from a bounded LRU cache instead of re-flashing the
+equation of state.
+
+Property bundles come from a pluggable backend. The backend is chosen per
+call with the backend argument, for a block of code with use_backend(), or
+for the whole process with set_backend(). use_backend() is held in a
+context variable, so switching it in one thread does not affect others.
+
+Figures below are for water at 1 atm and 2-97 °C, measured as one
+rho/cp/k/mu/Pr bundle per state:
+
+    Backend   Source                         Time/state  Max rel. error vs HEOS
+    HEOS      CoolProp Helmholtz EOS         ~40 us      reference
+    TTSE      CoolProp TTSE&HEOS tables      ~2 us       rho 3e-5, cp 1e-3, mu/Pr 6e-2
+    BICUBIC   CoolProp BICUBIC&HEOS tables   ~2.5 us     rho 2e-6, cp 6e-5, mu/Pr 4e-2
+    IF97      CoolProp IAPWS-IF97 (water)    ~8 us       rho 2e-5, cp/Pr 5e-4, k/mu 3e-5
+    TABLE     solvers.property_tables        ~0.6 us*    see property_tables (< 1e-3)
+    CSV       tables/waterproperties.csv     ~3 us       rho 8e-3, mu 9e-3, k 2e-2, Pr 3e-2
+
+* per state on the array path; scalar lookups pay NumPy call overhead.
+
+TTSE and BICUBIC build their tables on first use, which takes about 10 s
+per fluid. CoolProp then caches them in ~/.CoolProp. Their transport
+properties are the least accurate near the ends of the table. CSV treats
+the liquid as saturated at T (pressure is ignored), and it only covers
+water from 0 to 100 °C. Use HEOS or IF97 for final reports and TABLE, TTSE
+or BICUBIC for screening studies.
+
+The module is thread-safe. CoolProp AbstractState objects are not, so each
+thread gets its own pool of states, keyed by (backend, fluid). The LRU
+cache is shared between threads behind a lock. Solvers can therefore be
+run side by side on a ThreadPoolExecutor (see solvers.batch). The one
+process-wide setting is set_backend(), which should be called before
+workers start; use use_backend() inside workers.
+
+Property calls can be profiled with instrument(). While it is active, every
+fluid_props(), fluid_props_array(), props_si() and saturation-curve query
+is counted and timed, grouped by solver, fluid and output:
+
+    with instrument() as stats:
+        calculate_dphx(...)
+    print(stats.to_json(indent=2))
+"""
+
+import contextvars
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import NamedTuple
+import numpy as np
+import CoolProp
+import CoolProp.CoolProp as CP
+from solvers.waterinterpolator import WaterInterp
+
+# Significant digits kept when quantizing state values for cache keys. Seven
+# digits is a relative step of 1e-7 to 1e-6: about 1e-4 K near room
+# temperature, a tenth of the solvers' DEFAULT_TOLERANCE_K (1e-3 K). Iterates
+# that agree to well within the convergence tolerance therefore share a cache
+# entry, and the property error this introduces stays far below it.
+QUANTIZE_DIGITS = 7
+
+# Default number of cached property values (None = unbounded, 0 = disabled)
+DEFAULT_CACHE_SIZE = 4096
+
+
+class PropertyCache:
+    """Thread-safe least-recently-used cache of property values with hit/miss counters."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, func, *args):
+        return self.lookup(key, func, *args)[0]
+
+    def lookup(self, key, func, *args):
+        """Return (value, hit), computing and storing the value on a miss."""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value, True
+
+        # Compute outside the lock so other threads are not held up by a flash
+        value = func(*args)
+        if self.maxsize != 0:
+            with self._lock:
+                self._entries[key] = value
+                self._evict()
+        return value, False
+
+    def resize(self, maxsize):
+        if maxsize is not None and maxsize < 0:
+            raise ValueError(f"Cache size must be None or non-negative, got {maxsize}")
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def _evict(self):
+        if self.maxsize is None:
+            return
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+_cache = PropertyCache()
+
+
+class PropertyStats:
+    """Counts, cache hits and time of property calls, keyed by (solver, fluid, output).
+
+    Calls that do not go through the LRU cache (array lookups and
+    saturation curves) count as neither hits nor misses.
+    """
+
+    GROUPS = ("solver", "fluid", "output")
+
+    def __init__(self):
+        self.records = {}   # (solver, fluid, output) -> [calls, hits, misses, seconds]
+        self._lock = threading.Lock()
+
+    def add(self, solver, fluid, output, hit, seconds):
+        with self._lock:
+            record = self.records.setdefault((solver, fluid, output), [0, 0, 0, 0.0])
+            record[0] += 1
+            if hit is not None:
+                record[1 if hit else 2] += 1
+            record[3] += seconds
+
+    @staticmethod
+    def _summary(calls, hits, misses, seconds):
+        return {
+            "calls": calls,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else None,
+            "time_s": seconds,
+        }
+
+    def _grouped(self, positions):
+        totals = {}
+        for key, record in self.records.items():
+            group = tuple(key[i] for i in positions)
+            total = totals.setdefault(group, [0, 0, 0, 0.0])
+            for i, value in enumerate(record):
+                total[i] += value
+        return totals
+
+    def as_dict(self):
+        """Totals overall and per solver, fluid and output, plus every (solver, fluid, output) row."""
+        with self._lock:
+            result = {"total": self._summary(*self._grouped(())[()]) if self.records
+                      else self._summary(0, 0, 0, 0.0)}
+            for i, group in enumerate(self.GROUPS):
+                result[f"by_{group}"] = {key[0]: self._summary(*total)
+                                         for key, total in self._grouped((i,)).items()}
+            result["calls"] = [dict(zip(self.GROUPS, key), **self._summary(*record))
+                               for key, record in self.records.items()]
+        return result
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.as_dict(), **kwargs)
+
+
+# Active PropertyStats collectors (shared by all threads) and the solver running in this context
+_collectors = []
+_collectors_lock = threading.Lock()
+_current_solver = contextvars.ContextVar("current_solver", default=None)
+
+
+@contextmanager
+def instrument():
+    """Record property calls made by any thread while the block runs; yields a PropertyStats."""
+    stats = PropertyStats()
+    with _collectors_lock:
+        _collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        with _collectors_lock:
+            _collectors.remove(stats)
+
+
+def solver_scope(func):
+    """Decorator that labels property calls made inside func with its name."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current_solver.set(func.__name__)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_solver.reset(token)
+    return wrapper
+
+
+def is_recording():
+    """True while at least one instrument() block is active."""
+    return bool(_collectors)
+
+
+def record_call(fluid, output, hit, seconds):
+    """Add one property call to every active collector."""
+    solver = _current_solver.get()
+    for stats in list(_collectors):
+        stats.add(solver, fluid, output, hit, seconds)
+
+
+def _cached(output, fluid, key, func, *args):
+    if not _collectors:
+        return _cache.get_or_compute(key, func, *args)
+    start = time.perf_counter()
+    value, hit = _cache.lookup(key, func, *args)
+    record_call(fluid, output, hit, time.perf_counter() - start)
+    return value
+
+
+def quantize(value):
+    """Round a state value to QUANTIZE_DIGITS significant digits."""
+    return float(f"{float(value):.{QUANTIZE_DIGITS}g}")
+
+
+def props_si(output, name1, value1, name2, value2, fluid):
+    """Cached, thread-safe drop-in replacement for CoolProp's PropsSI (scalar inputs only).
+
+    fluid may carry a backend prefix as in PropsSI, e.g. "IF97::Water".
+    The bundled solvers use fluid_props() instead; this is kept for scripts
+    and GUI code that need single outputs or other input pairs (e.g. "Q").
+    """
+    value1 = quantize(value1)
+    value2 = quantize(value2)
+    key = (output, name1, name2, value1, value2, fluid)
+    return _cached(output, fluid, key, _props_si, output, name1, value1, name2, value2, fluid)
+
+
+def _props_si(output, name1, value1, name2, value2, fluid):
+    backend, _, name = fluid.rpartition("::")
+    state = get_fluid_state(name, backend or "HEOS")._state
+    try:
+        state.update(*CP.generate_update_pair(CP.get_parameter_index(name1), value1,
+                                              CP.get_parameter_index(name2), value2))
+        return state.keyed_output(CP.get_parameter_index(output))
+    except RuntimeError as e:
+        # Unknown parameter names surface as RuntimeError from CoolProp
+        raise ValueError(str(e))
+
+
+class FluidProperties(NamedTuple):
+    """Single-phase property bundle at one (T, P) state, in SI units.
+
+    The array path returns the same record with NumPy arrays as fields.
+    """
+    rho: float  # Density, kg/m^3
+    cp: float   # Specific heat, J/kg-K
+    k: float    # Thermal conductivity, W/m-K
+    mu: float   # Dynamic viscosity, Pa-s
+    pr: float   # Prandtl number
+    nu: float   # Kinematic viscosity, m^2/s
+
+
+class FluidState:
+    """CoolProp AbstractState for one fluid, flashed once per (T, P) update."""
+
+    def __init__(self, fluid, backend="HEOS"):
+        self.fluid = fluid
+        self.backend = backend
+        self._state = CoolProp.AbstractState(backend, fluid)
+
+    def props(self, T, P):
+        state = self._state
+        state.update(CoolProp.PT_INPUTS, P, T)
+        rho = state.rhomass()
+        mu = state.viscosity()
+        return FluidProperties(rho, state.cpmass(), state.conductivity(), mu, state.Prandtl(), mu / rho)
+
+    def props_array(self, T, P):
+        T, P = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(P, dtype=float))
+        rho, cp, k, mu, pr = np.empty((5, T.size))
+
+        # Quantize like the scalar path so both return identical numbers
+        state = self._state
+        update = state.update
+        for i, (T_i, P_i) in enumerate(zip(T.flat, P.flat)):
+            update(CoolProp.PT_INPUTS, quantize(P_i), quantize(T_i))
+            rho[i] = state.rhomass()
+            cp[i] = state.cpmass()
+            k[i] = state.conductivity()
+            mu[i] = state.viscosity()
+            pr[i] = state.Prandtl()
+
+        rho, cp, k, mu, pr = (values.reshape(T.shape) for values in (rho, cp, k, mu, pr))
+        return FluidProperties(rho, cp, k, mu, pr, mu / rho)
+
+
+# Per-thread pool of FluidState objects keyed by (backend, fluid)
+_thread_local = threading.local()
+
+
+def get_fluid_state(fluid, backend="HEOS"):
+    """Return the calling thread's FluidState for a fluid and CoolProp backend, creating it on first use."""
+    try:
+        states = _thread_local.fluid_states
+    except AttributeError:
+        states = _thread_local.fluid_states = {}
+
+    key = (backend, fluid)
+    state = states.get(key)
+    if state is None:
+        state = states[key] = FluidState(fluid, backend)
+    return state
+
+
+class CoolPropBackend:
+    """Property bundles from a CoolProp AbstractState backend."""
+
+    def __init__(self, coolprop_backend):
+        self.coolprop_backend = coolprop_backend
+
+    def props(self, fluid, T, P):
+        return get_fluid_state(fluid, self.coolprop_backend).props(T, P)
+
+    def props_array(self, fluid, T, P):
+        return get_fluid_state(fluid, self.coolprop_backend).props_array(T, P)
+
+
+class TableBackend:
+    """Property bundles interpolated from the precomputed grids in solvers.property_tables."""
+
+    def props(self, fluid, T, P):
+        return FluidProperties(*(float(value) for value in self.props_array(fluid, T, P)))
+
+    def props_array(self, fluid, T, P):
+        # Imported here because property_tables itself builds on this module
+        from solvers.property_tables import table_props
+        return table_props(fluid, T, P)
+
+
+class WaterTableBackend:
+    """Saturated-liquid water properties from tables/waterproperties.csv (pressure is ignored)."""
+
+    COLUMNS = ("rho", "cp", "k", "mu", "Pr")
+
+    def props(self, fluid, T, P):
+        return FluidProperties(*(float(value) for value in self.props_array(fluid, T, P)))
+
+    def props_array(self, fluid, T, P):
+        if fluid != "Water":
+            raise ValueError(f"The CSV property backend only supports Water, not '{fluid}'")
+        table = WaterInterp(np.asarray(T, dtype=float) - 273.15, self.COLUMNS)
+        rho = table["rho"]
+        mu = table["mu"]
+        return FluidProperties(rho, table["cp"] * 1000, table["k"], mu, table["Pr"], mu / rho)
+
+
+BACKENDS = {
+    "HEOS": CoolPropBackend("HEOS"),
+    "TTSE": CoolPropBackend("TTSE&HEOS"),
+    "BICUBIC": CoolPropBackend("BICUBIC&HEOS"),
+    "IF97": CoolPropBackend("IF97"),
+    "TABLE": TableBackend(),
+    "CSV": WaterTableBackend(),
+}
+
+_default_backend = "HEOS"
+
+# Per-context override set by use_backend(); None falls back to _default_backend
+_backend_override = contextvars.ContextVar("backend_override", default=None)
+
+
+def register_backend(name, backend):
+    """Add a backend providing props(fluid, T, P) and props_array(fluid, T, P)."""
+    BACKENDS[name] = backend
+
+
+def get_backend_name(backend=None):
+    """Resolve a backend name: the argument, then use_backend(), then the process default."""
+    name = backend if backend is not None else _backend_override.get()
+    if name is None:
+        name = _default_backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown property backend '{name}'. Available: {', '.join(BACKENDS)}")
+    return name
+
+
+def set_backend(name):
+    """Set the process-wide default property backend.
+
+    This affects every thread; call it at start-up, not from batch workers.
+    """
+    global _default_backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown property backend '{name}'. Available: {', '.join(BACKENDS)}")
+    _default_backend = name
+
+
+@contextmanager
+def use_backend(name):
+    """Switch the default property backend for the current thread or task only."""
+    token = _backend_override.set(get_backend_name(name))
+    try:
+        yield
+    finally:
+        _backend_override.reset(token)
+
+
+def _compute_props(name, fluid, T, P):
+    return BACKENDS[name].props(fluid, T, P)
+
+
+def fluid_props(fluid, T, P, backend=None):
+    """Cached property bundle for a fluid at temperature T (K) and pressure P (Pa)."""
+    name = get_backend_name(backend)
+    T = quantize(T)
+    P = quantize(P)
+    key = (name, "T", "P", T, P, fluid)
+    return _cached(f"bundle:{name}", fluid, key, _compute_props, name, fluid, T, P)
+
+
+def fluid_props_array(fluid, T, P, backend=None):
+    """Property bundle of arrays for broadcastable arrays of T (K) and P (Pa).
+
+    Bypasses the LRU cache. With the CoolProp backends the values match
+    fluid_props() element for element.
+    """
+    name = get_backend_name(backend)
+    if not _collectors:
+        return BACKENDS[name].props_array(fluid, T, P)
+    start = time.perf_counter()
+    result = BACKENDS[name].props_array(fluid, T, P)
+    record_call(fluid, f"array:{name}", None, time.perf_counter() - start)
+    return result
+
+
+def set_cache_size(maxsize):
+    """Set the maximum number of cached values (None = unbounded, 0 = disabled)."""
+    _cache.resize(maxsize)
+
+
+def cache_info():
+    """Return hit/miss counters and the current size of the property cache."""
+    return _cache.info()
+
+
+def clear_cache():
+    """Drop every cached value and reset the hit/miss counters."""
+    _cache.clear()
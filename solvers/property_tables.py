@@ -0,0 +1,200 @@
+"""
+Precomputed property tables for fast single-phase lookups.
+
+A table holds rho, cp, k, mu and Pr on a dense grid that is uniform in T
+and in log(P). It is built once per fluid from CoolProp HEOS and stored as
+an .npz file under the cache directory. Lookups use vectorized bicubic
+(Catmull-Rom) interpolation.
+
+The grid spans 200-600 K and 10 kPa-10 MPa. It is clipped to 0.9 Tcrit
+and 0.8 Pcrit so the critical region, where cp diverges, is never
+interpolated. Measured maximum relative error against HEOS over random
+single-phase states in the default 301 x 81 grid, across all five fluids:
+    rho, k, Pr    < 5e-4
+    mu            < 2e-5
+    cp            < 1e-3
+
+A query falls back to exact HEOS values through fluid_props_array() in two
+cases. One is a query outside the table. The other is an interpolation
+stencil that straddles a phase boundary or touches a node CoolProp could
+not evaluate. Measured per-state cost of batched lookups whose stencils
+are interpolated:
+
+    batch     table        HEOS, water   HEOS, organics and R134a
+    100       1.1-2.4 us   ~40 us        10-14 us
+    1000+     0.5-0.8 us   ~40 us        10-17 us
+
+That is about 60x faster than HEOS for water and 15-35x for the other
+fluids on large batches. Each state that falls back costs a full HEOS
+flash. Random states spread over the whole grid fall back about 4% of the
+time, which raises the average to 1-3 us per state. A single scalar lookup
+is dominated by NumPy call overhead (~100 us) and should go through the
+cached fluid_props() instead.
+"""
+
+import threading
+import zipfile
+from pathlib import Path
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import CoolProp
+from solvers.catalog import CACHE_DIR
+from solvers.properties import FluidProperties, fluid_props_array
+
+# Fluids offered by the exchanger frames
+TABLE_FLUIDS = ("Water", "Hexane", "Ethanol", "Benzene", "R134a")
+
+# Default grid resolution and range
+T_POINTS = 301
+P_POINTS = 81
+T_RANGE = (200.0, 600.0)    # K, clipped to [Tmin, 0.9 * Tcrit] for each fluid
+P_RANGE = (1.0e4, 1.0e7)    # Pa, clipped to 0.8 * Pcrit for each fluid
+
+TABLE_VERSION = 1
+
+
+def _catmull_rom_weights(t):
+    t2 = t * t
+    t3 = t2 * t
+    return np.stack((
+        0.5 * (-t3 + 2 * t2 - t),
+        0.5 * (3 * t3 - 5 * t2 + 2),
+        0.5 * (-3 * t3 + 4 * t2 + t),
+        0.5 * (t3 - t2),
+    ), axis=-1)
+
+
+class PropertyTable:
+    """Gridded rho/cp/k/mu/Pr for one fluid with bicubic lookups."""
+
+    def __init__(self, fluid, T, log_p, values, phase):
+        self.fluid = fluid
+        self.T = T              # (n_T,) temperatures, K
+        self.log_p = log_p      # (n_P,) natural log of pressure, Pa
+        self.values = values    # (5, n_T, n_P) rho, cp, k, mu, Pr
+        self.phase = phase      # (n_T, n_P) CoolProp phase index
+
+        # smooth[i, j] is True when the 4x4 stencil starting at node (i, j) is
+        # finite and single-phase, i.e. safe to interpolate
+        windows = sliding_window_view(phase, (4, 4))
+        finite = np.all(np.isfinite(values), axis=0)
+        self._smooth = np.zeros(phase.shape, dtype=bool)
+        self._smooth[:-3, :-3] = (np.all(windows == windows[..., :1, :1], axis=(-2, -1))
+                                  & np.all(sliding_window_view(finite, (4, 4)), axis=(-2, -1)))
+
+    @classmethod
+    def build(cls, fluid, t_points=T_POINTS, p_points=P_POINTS):
+        state = CoolProp.AbstractState("HEOS", fluid)
+        T_min = max(T_RANGE[0], state.Tmin() + 1.0)
+        T_max = min(T_RANGE[1], 0.9 * state.T_critical())
+        P_max = min(P_RANGE[1], 0.8 * state.p_critical())
+        T = np.linspace(T_min, T_max, t_points)
+        log_p = np.linspace(np.log(P_RANGE[0]), np.log(P_max), p_points)
+
+        values = np.full((5, t_points, p_points), np.nan)
+        phase = np.full((t_points, p_points), -1, dtype=np.int8)
+        for i, T_i in enumerate(T):
+            for j, P_j in enumerate(np.exp(log_p)):
+                try:
+                    state.update(CoolProp.PT_INPUTS, P_j, T_i)
+                    values[:, i, j] = (state.rhomass(), state.cpmass(), state.conductivity(),
+                                       state.viscosity(), state.Prandtl())
+                    phase[i, j] = state.phase()
+                except ValueError:
+                    # Leave the node as NaN; lookups touching it fall back to HEOS
+                    pass
+
+        return cls(fluid, T, log_p, values, phase)
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, fluid=self.fluid, T=self.T, log_p=self.log_p, values=self.values,
+                 phase=self.phase, version=TABLE_VERSION, coolprop=CoolProp.__version__)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data["version"]) != TABLE_VERSION or str(data["coolprop"]) != CoolProp.__version__:
+                raise ValueError(f"Stale property table: {path}")
+            return cls(str(data["fluid"]), data["T"], data["log_p"], data["values"], data["phase"])
+
+    def props(self, T, P):
+        T, P = np.broadcast_arrays(np.asarray(T, dtype=float), np.asarray(P, dtype=float))
+        shape = T.shape
+        T = T.ravel()
+        log_p = np.log(P.ravel())
+
+        n_T = len(self.T)
+        n_P = len(self.log_p)
+        x = (T - self.T[0]) / (self.T[1] - self.T[0])
+        y = (log_p - self.log_p[0]) / (self.log_p[1] - self.log_p[0])
+
+        # Only cells with a full 4x4 stencil inside the grid are interpolated
+        inside = (x >= 1) & (x < n_T - 2) & (y >= 1) & (y < n_P - 2)
+        i = np.where(inside, x, 1).astype(np.intp)
+        j = np.where(inside, y, 1).astype(np.intp)
+        corner = (i - 1) * n_P + (j - 1)    # flat index of the stencil's first node
+        valid = inside & self._smooth.ravel()[corner]
+
+        # One gather of every 4x4 stencil, contracted with the outer product of the weights
+        stencil = (np.arange(4)[:, None] * n_P + np.arange(4)).ravel()
+        nodes = self.values.reshape(5, -1)[:, corner[:, None] + stencil]     # (5, n, 16)
+        weights = (_catmull_rom_weights(x - i)[:, :, None]
+                   * _catmull_rom_weights(y - j)[:, None, :]).reshape(-1, 16)
+        result = np.einsum("nk,vnk->vn", weights, nodes)
+
+        # Exact HEOS values where the table cannot answer
+        if not np.all(valid):
+            fallback = ~valid
+            exact = fluid_props_array(self.fluid, T[fallback], np.exp(log_p[fallback]), backend="HEOS")
+            result[:, fallback] = exact[:5]
+
+        rho, cp, k, mu, pr = (values.reshape(shape) for values in result)
+        return FluidProperties(rho, cp, k, mu, pr, mu / rho)
+
+
+_tables = {}                # (fluid, table_path) -> PropertyTable
+_tables_lock = threading.Lock()
+
+
+def table_path(fluid, cache_dir=None):
+    """Location of the cached .npz table for a fluid."""
+    cache_dir = Path(cache_dir) if cache_dir is not None else CACHE_DIR
+    return cache_dir / f"{fluid}_{T_POINTS}x{P_POINTS}_v{TABLE_VERSION}.npz"
+
+
+def get_table(fluid, cache_dir=None):
+    """Return the table for a fluid, loading it from disk or building it on first use.
+
+    Tables are cached per (fluid, file path), so a different cache_dir loads
+    (or builds and saves) its own copy.
+    """
+    path = table_path(fluid, cache_dir)
+    key = (fluid, path)
+    table = _tables.get(key)
+    if table is not None:
+        return table
+
+    with _tables_lock:
+        table = _tables.get(key)
+        if table is not None:
+            return table
+
+        try:
+            table = PropertyTable.load(path)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            table = PropertyTable.build(fluid)
+            try:
+                table.save(path)
+            except OSError:
+                # Read-only cache location; keep the table in memory only
+                pass
+
+        _tables[key] = table
+    return table
+
+
+def table_props(fluid, T, P):
+    """Tabulated property bundle (arrays) for arrays of T (K) and P (Pa)."""
+    return get_table(fluid).props(T, P)
@@ -0,0 +1,131 @@
+"""
+Property tables and saturation curves in shared memory for process pools.
+
+The parent process builds (or loads) the tables once and copies their
+arrays into one multiprocessing.shared_memory block. Workers attach to the
+block by name. Their tables are NumPy views onto that block, so no copy is
+made. This keeps worker startup and resident memory flat no matter how many
+fluids or workers there are.
+
+    with share_tables(["Water", "Ethanol"], saturation_fluids=["Water"]) as shared:
+        with ProcessPoolExecutor(initializer=attach_tables, initargs=(shared.handle,)) as pool:
+            results = list(pool.map(run_case, cases))
+
+Only the creating process should unlink the block; share_tables() does it
+when the with-block ends.
+"""
+
+from multiprocessing import shared_memory
+import numpy as np
+from solvers import property_tables, saturation
+from solvers.property_tables import PropertyTable, TABLE_FLUIDS, get_table
+from solvers.saturation import SaturationCurve, saturation_curve
+
+# Arrays needed to rebuild each object
+TABLE_ARRAYS = ("T", "log_p", "values", "phase")
+CURVE_ARRAYS = ("T", "values")
+
+# Offsets are rounded up to this many bytes
+ALIGNMENT = 64
+
+# Blocks attached by this process, kept open for the lifetime of the views
+_attached = {}
+
+
+class SharedTables:
+    """Shared-memory block holding property tables and saturation curves.
+
+    handle is a small picklable dict that workers pass to attach_tables().
+    """
+
+    def __init__(self, shm, handle):
+        self.shm = shm
+        self.handle = handle
+
+    def close(self):
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        self.unlink()
+
+
+def _layout(sources):
+    """Byte offset, shape and dtype of every array, packed back to back."""
+    layout = {}
+    offset = 0
+    for key, array in sources.items():
+        layout[key] = (offset, array.shape, array.dtype.str)
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    return layout, max(offset, 1)
+
+
+def _view(shm, entry):
+    offset, shape, dtype = entry
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+
+
+def share_tables(fluids=TABLE_FLUIDS, saturation_fluids=()):
+    """Copy property tables and saturation curves into a new shared-memory block.
+
+    Tables are loaded from the on-disk cache or built first if needed.
+    """
+    sources = {}
+    for fluid in fluids:
+        table = get_table(fluid)
+        for name in TABLE_ARRAYS:
+            sources[("table", fluid, name)] = np.ascontiguousarray(getattr(table, name))
+    for fluid in saturation_fluids:
+        curve = saturation_curve(fluid)
+        for name in CURVE_ARRAYS:
+            sources[("curve", fluid, name)] = np.ascontiguousarray(getattr(curve, name))
+
+    layout, size = _layout(sources)
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    for key, array in sources.items():
+        _view(shm, layout[key])[...] = array
+
+    handle = {
+        "name": shm.name,
+        "tables": {fluid: {name: layout[("table", fluid, name)] for name in TABLE_ARRAYS}
+                   for fluid in fluids},
+        "curves": {fluid: {name: layout[("curve", fluid, name)] for name in CURVE_ARRAYS}
+                   for fluid in saturation_fluids},
+    }
+    return SharedTables(shm, handle)
+
+
+def attach_tables(handle):
+    """Install the shared tables and curves in this process's caches.
+
+    Suitable as a process-pool initializer. The arrays are read-only views
+    onto the shared block.
+    """
+    name = handle["name"]
+    shm = _attached.get(name)
+    if shm is None:
+        shm = _attached[name] = shared_memory.SharedMemory(name=name)
+
+    def views(entries):
+        arrays = {}
+        for key, entry in entries.items():
+            array = _view(shm, entry)
+            array.flags.writeable = False
+            arrays[key] = array
+        return arrays
+
+    for fluid, entries in handle["tables"].items():
+        arrays = views(entries)
+        # Installed under the default cache location, which table_props() reads
+        key = (fluid, property_tables.table_path(fluid))
+        property_tables._tables[key] = PropertyTable(fluid, arrays["T"], arrays["log_p"],
+                                                     arrays["values"], arrays["phase"])
+    for fluid, entries in handle["curves"].items():
+        arrays = views(entries)
+        saturation._curves[fluid] = SaturationCurve(fluid, arrays["T"], arrays["values"])
@@ -1,7 +1,9 @@
 import numpy as np
-import pandas as pd
-from pathlib import Path
-from CoolProp.CoolProp import PropsSI
+from typing import NamedTuple
+from solvers.catalog import get_catalog, shell_layout, tube_count, tube_dimensions
+from solvers.convergence import DEFAULT_MAX_ITERATIONS, DEFAULT_TOLERANCE_K, IterationDriver, OutletState
+from solvers.friction import friction_factor
+from solvers.properties import fluid_props, solver_scope
 
 # Conversion Factors
 PA_TO_KPA = 0.001
@@ -12,304 +14,481 @@ DEG_F_TO_K = lambda F: (F - 32) * 5/9 + DEG_C_TO_K
 BTU_HR_FT2_F_TO_W_M2_K = 5.6782639
 pressure_pa = 101325
 
-BASE_PATH = Path(__file__).parent.parent
-TUBE_DIMENSIONS_PATH = BASE_PATH/"tables"/"tubedimensions.csv"
-SHELL_TUBE_COUNT = BASE_PATH/"tables"/"shelltubecounts.csv"
-
-def calculate_shelltube(
-        length, shell_id, tube_od, tube_bwg,
-        arrangement, tube_pitch, passes, baffles,
-        warm_fluid, warm_fluid_inlet_temp, warm_fluid_mass_flow,
-        cool_fluid, cool_fluid_inlet_temp, cool_fluid_mass_flow):
-    ## Givens
-
-# mass flow rates
-    m_w = float(warm_fluid_mass_flow)     # mass flow rate of warmer fluid
-    m_c = float(cool_fluid_mass_flow)       # mass flow rate of cooler fluid
+# Fouling Factors (inner, outer) after one year of service
+R_DI = 1.76e-4
+R_DO = 1.76e-4
+
+# Tube surface roughness, m
+STEEL_ROUGHNESS = 0.000046
+COPPER_ROUGHNESS = 0.0000015
+
+# Sizing search: baffle counts tried, and the allowed baffle spacing as a
+# fraction of the shell ID (TEMA rule of thumb)
+SIZING_BAFFLES = range(1, 41)
+MIN_BAFFLE_SPACING = 0.2
+MAX_BAFFLE_SPACING = 1.0
+
+
+class ShellTubeGeometry(NamedTuple):
+    """Temperature-independent geometry of a shell-and-tube exchanger (SI units)."""
+    length: float           # Tube length, m
+    OD_t: float             # Outer D of tubes, m
+    ID_t: float             # Inner D of tubes, m
+    N_t: int                # Number of tubes
+    N_p: int                # Tube passes
+    D_s: float              # Shell inner D, m
+    N_b: float              # Number of baffles
+    baffle_spacing: float   # Baffle spacing, m
+    pitch: float            # Tube pitch, m
+    layout: str             # "square" or "triangular"
+    A_t: float              # Flow area, tubes, m^2
+    A_s: float              # Flow area, shell, m^2
+    D_e: float              # Shell equivalent diameter, m
+    A_o: float              # Outer heat transfer area, m^2
+
+
+def shelltube_geometry(length, shell_id, tube_od, tube_bwg, arrangement, tube_pitch, passes, baffles):
+    """Look up tube and shell data and precompute flow areas and diameters."""
+    N_p = int(passes)     # passes
+    Length = float(length)       # exchanger length
 
-    # inlet temps
-    Temp1 =  float(warm_fluid_inlet_temp)               # inlet temp of warmer fluid
-    temp1 =  float(cool_fluid_inlet_temp)                # inlet temp of cooler fluid
+    ## Get tube and shell dimensions (catalog values are in meters)
+    tube = tube_dimensions(tube_od, tube_bwg)
+    shell = shell_layout(tube_od, tube_pitch, arrangement, shell_id)
+    N_t = tube_count(tube_od, tube_pitch, arrangement, shell_id, N_p)     # tubes
 
-    # Tubing Sizes
-    OD_t = float(tube_od)    # Outer D of tubes
-    N_p = int(passes)     # passes
+    return layout_geometry(Length, tube.od, tube.id, N_t, N_p, shell.shell_id, float(baffles), shell.pitch,
+                           shell.layout)
 
-    Length = float(length)       # exchanger length
-    
-    ## Get tube dimensions
-    tube_dimensions = pd.read_csv(TUBE_DIMENSIONS_PATH)
-    
-    # Use tube_od and tube_bwg to find tube_id
-    tube_data = tube_dimensions.loc[(tube_dimensions["tube_od_in"]==OD_t) & (tube_dimensions["bwg"]==int(tube_bwg))]
-    
-    if tube_data.empty:
-        raise ValueError(f"Tube dimensions not found for tube_od_in={OD_t}, bwg={tube_bwg}")
-    
-    tube_dict = tube_data.iloc[0].to_dict()
-    
-    ## Get number of tubes
-    num_t = pd.read_csv(SHELL_TUBE_COUNT)
-    
-    # Use tube_od_in, pitch_in, pitch_layout, shell_id_in, and n_pass to find Number of Tubes (N_t)
-    
-    if arrangement is None:
-        raise ValueError("Arrangement cannot be None")
-    
-    num_t_data = num_t.loc[(num_t["tube_od_in"]==OD_t) &
-                           (num_t["pitch_in"]==float(tube_pitch)) &
-                           (num_t["pitch_layout"]==arrangement.lower()) &
-                           (num_t["shell_id_in"]==float(shell_id))
-                            ]
-    
-    if num_t_data.empty:
-        raise ValueError(f"Tube count data not found for tube_od={OD_t}, pitch={tube_pitch}, arrangement={arrangement}, shell_id={shell_id}")
-    
-    num_t_dict = num_t_data.iloc[0].to_dict()
-    
-    ID_t = tube_dict["tube_id_cm"] / 100  # Inner D of tubes
-    N_t = num_t_dict[str(N_p) + "_pass"]     # tubes
-
-    # Shell Data
-
-    D_s = float(shell_id)     # Shell Inner D
-    N_b = float(baffles)     # # baffles
-    Baffle_Spacing = Length / (N_b + 1)       # Baffle spacing
-    Pitch_T = float(tube_pitch)     # Tube pitch
 
+def layout_geometry(Length, OD_t, ID_t, N_t, N_p, D_s, N_b, Pitch_T, layout):
+    """ShellTubeGeometry from dimensions in meters; every argument may be an array."""
+    Baffle_Spacing = Length / (N_b + 1)
     Clearance = Pitch_T - OD_t     # Clearance between tubes
 
+    ## Flow Areas
 
-    # Fouling Factors
+    A_t = N_t * np.pi * ID_t**2 / (4 * N_p)    # flow area tubes
+    A_s = D_s * Clearance * Baffle_Spacing / Pitch_T                # flow area shell
 
-    R_di = 1.76e-4        # input fouling inner
-    R_do = 1.76e-4        # input fouling outer
+    ## Shell Equivalent Diameters
 
-    wiswater = True            # input if warm fluid is water
-    ciswater = True             # input if cool fluid is water
+    D_e = np.where(np.asarray(layout) == "square",
+                   (4 * Pitch_T**2 - np.pi * OD_t**2)/(np.pi * OD_t),
+                   (3.46 * Pitch_T**2 - np.pi * OD_t**2)/(np.pi * OD_t))
+    if D_e.ndim == 0:
+        D_e = float(D_e)
 
-    # friction factor
+    A_o = N_t * np.pi * OD_t * Length      # surface area of heat transfer
 
-    pipe_mat = "Steel"  # Default pipe material
+    return ShellTubeGeometry(Length, OD_t, ID_t, N_t, N_p, D_s, N_b, Baffle_Spacing, Pitch_T, layout,
+                             A_t, A_s, D_e, A_o)
 
-    # Surface roughness based on pipe material
-    if pipe_mat == "Copper":
-        epsilon = 0.0000015  # Copper pipe roughness in meters
-    else:  # Steel
-        epsilon = 0.000046   # Steel pipe roughness in meters
 
-    ## Fluid Properties
-    m_w_greater = False        # assume m_w as smaller mass flow
+def one_two_shell_effectiveness(U, A_o, h_cap_c, R_factor):
+    """Cool-side temperature effectiveness S of a 1-shell, 2-pass exchanger.
 
-    if m_w > m_c:               # verify
-        m_w_greater = True     # correction 
-        
-    ## Water Properties Loop
-    t_loop = True
+    U may be an array (e.g. clean and fouled coefficients); R_factor is the
+    ratio of heat capacitances, cool / warm.
+    """
+    root = (R_factor**2 + 1)**0.5
+    Const1 = np.exp(np.asarray(U) * A_o / h_cap_c * root)
+    Const2 = R_factor + 1 - root
+    Const3 = R_factor + 1 + root
+    return 2*(1 - Const1) / (Const2 - Const1*Const3)
 
-    Temp2 = (Temp1 + temp1) * .5        # initial guess Temp2
-    temp2 = (Temp1 + temp1) * .5       # initial guess temp2
 
-    while t_loop == True:
-        Tavg = (Temp1 + Temp2) * .5 + 273.15      # Tavg based on Temp1 and Temp2
-        tavg = (temp1 + temp2) * .5 + 273.15     # tavg based on temp1 and temp2
-        
-        if wiswater == True:
-            rho_w = PropsSI('D', 'T', Tavg, 'P', pressure_pa, 'Water')    # Density
-            k_w = PropsSI('L', 'T', Tavg, 'P', pressure_pa, 'Water')       # Thermal Conductivity
-            cp_w = PropsSI('Cpmass', 'T', Tavg, 'P', pressure_pa, 'Water') # Specific Heat
-            mu_w = PropsSI('V', 'T', Tavg, 'P', pressure_pa, 'Water')      # Dynamic Viscosity
-            pr_w = PropsSI('Prandtl', 'T', Tavg, 'Q', 0, 'Water')       # Prandtl Number
-            nu_w = mu_w / rho_w                  # Kinematic Viscosity
-            
-
-        if ciswater == True:
-            rho_c = PropsSI('D', 'T', tavg, 'P', pressure_pa, 'Water')    # Density
-            k_c = PropsSI('L', 'T', tavg, 'P', pressure_pa, 'Water')       # Thermal Conductivity
-            cp_c = PropsSI('Cpmass', 'T', tavg, 'P', pressure_pa, 'Water') # Specific Heat
-            mu_c = PropsSI('V', 'T', tavg, 'P', pressure_pa, 'Water')      # Dynamic Viscosity
-            pr_c = PropsSI('Prandtl', 'T', tavg, 'Q', 0, 'Water')       # Prandtl Number
-            nu_c = mu_c / rho_c                  # Kinematic Viscosity
-            
-        ## Flow Areas
-            
-            A_t = N_t * np.pi * ID_t**2 / (4 * N_p)    # flow area tubes
-            A_s = D_s * Clearance * Baffle_Spacing / Pitch_T                # flow area shell
-            
-            A_s_greater = True
-            
-            if A_s < A_t:
-                A_s_greater = False
-                
-        ## Shell Equivalent Diameters
-
-        if arrangement.lower() == "square":
-            D_e = (4 * Pitch_T**2 - np.pi * OD_t**2)/(np.pi * OD_t)
-
-        if arrangement.lower() == "triangular":
-            D_e = (3.46 * Pitch_T**2 - np.pi * OD_t**2)/(np.pi * OD_t)
-
-        ## (Route higher mass flow rate through larger flow area)
-        if m_w_greater == A_s_greater:
-            V_s = m_w / (rho_w * A_s)
-            G_s = m_w / A_s
-
-            V_t = m_c / (rho_c * A_t)
-            G_t = m_c / A_t
-
-            # Reynolds Numbers
-            Re_s = V_s * D_e / nu_w
-            Re_t = V_t * ID_t / nu_c
-
-            # Nusselt Numbers
-            if Re_t < 2200:                                      # Condition for Nu laminar
-                Nu_t = (1.86 * ID_t * Re_t * pr_c / Length)**(1/3)   # Nu number
-            else:                                                # Condition for Nu turbulent
-                Nu_t = (0.023) * Re_t**(4/5) * pr_c ** 0.4        # Nu number
-                
-            Nu_s = 0.36*Re_s**0.55 * pr_w**(1/3)
-
-            # Convection Coefficients
-            h_i = Nu_t * k_c / ID_t
-            h_t = h_i * ID_t / OD_t
-
-            h_o = Nu_s * k_w / D_e
-
-        else:
-            V_t = m_w / (rho_w * A_t)
-            G_t = m_w / A_t
-
-            V_s = m_c / (rho_c * A_s)
-            G_s = m_c / A_s
-
-            # Reynolds Numbers
-            Re_t = V_t * ID_t / nu_w
-            Re_s = V_s * D_e / nu_c
-
-            # Nusselt Numbers
-            if Re_t < 2200:                                        # Condition for Nu laminar
-                Nu_t = (1.86 * ID_t * Re_t * pr_w / Length)**(1/3)   # Nu number
-            else:                                                # Condition for Nu turbulent
-                Nu_t = (0.023) * Re_t**(4/5) * pr_w ** 0.3        # Nu number
-                
-            Nu_s = 0.36*Re_s**0.55 * pr_c**(1/3)
-
-            # Convection Coefficients
-            h_i = Nu_t * k_w / ID_t
-            h_t = h_i * ID_t / OD_t
-
-            h_o = Nu_s * k_c / D_e
-
-        ## Exchanger Coefficients
-        U_o = (1/h_t + 1/h_o) ** -1  # Overall convection
-
-        ## Capacitances
-        h_cap_w = m_w * cp_w     # heat capacitance warm
-        h_cap_c = m_c * cp_c     # heat capacitance cool
+def counterflow_effectiveness(U, A_o, h_cap_c, R_factor):
+    """Cool-side temperature effectiveness S of a single-pass (pure counterflow) exchanger.
 
-        ## Outlet Temperature Calculations (L = 
+    Same arguments as one_two_shell_effectiveness(); written so the
+    exponential never overflows for R_factor above 1.
+    """
+    NTU = np.asarray(U) * A_o / h_cap_c
+    x = NTU * (1 - R_factor)
+    decay = np.exp(-np.abs(x))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        S = np.where(x > 0, (1 - decay) / (1 - R_factor*decay), (decay - 1) / (decay - R_factor))
+    return np.where(x == 0, NTU / (1 + NTU), S)
 
-        R_factor = h_cap_c/h_cap_w        # ratio of heat cap, cool / warm
 
-        A_o = N_t * np.pi * OD_t * Length      # surface area of heat transfer
+def shell_effectiveness(N_p):
+    """Effectiveness relation for N_p tube passes: counterflow for one, 1-2 shell otherwise."""
+    return counterflow_effectiveness if N_p == 1 else one_two_shell_effectiveness
 
-        # Calculations for C1, C2, C3, and S
 
-        Const1 = np.exp(U_o * A_o / h_cap_c * (R_factor**2 + 1)**0.5)
-        Const2 = (R_factor + 1 - (R_factor**2 + 1)**0.5)
-        Const3 = (R_factor + 1 + (R_factor**2 + 1)**0.5)
+def warm_in_shell(geometry, m_w, m_c):
+    """Whether the warm fluid goes through the shell (higher mass flow through larger flow area)."""
+    m_w_greater = m_w > m_c
+    A_s_greater = geometry.A_s >= geometry.A_t
+    return m_w_greater == A_s_greater
 
-        S_factor = 2*(1 - Const1) / (Const2 - Const1*Const3)
 
-        dsflk = U_o * A_o / h_cap_c
+class ShellTubeFlow(NamedTuple):
+    """Velocities, Reynolds numbers and clean U of a shell-and-tube exchanger."""
+    V_s: float      # Shell-side velocity, m/s
+    V_t: float      # Tube-side velocity, m/s
+    Re_s: float     # Shell-side Reynolds number
+    Re_t: float     # Tube-side Reynolds number
+    rho_s: float    # Shell-side density, kg/m^3
+    rho_t: float    # Tube-side density, kg/m^3
+    U_o: float      # Clean overall coefficient, W/m^2-K
 
-        T2_o = Temp2
-        t2_o = temp2
 
-        temp2 = S_factor*(Temp1-temp1) + temp1
-        Temp2 = Temp1 - R_factor*(temp2-temp1)
+def shelltube_flow(geometry, warm_shell, m_w, m_c, warm, cool):
+    """Shell- and tube-side flow and clean U_o from warm and cool FluidProperties.
 
-        Tavg = (Temp1 + Temp2)/ 2
-        tavg = (temp1 + temp2)/ 2
+    The geometry fields and warm_shell may be arrays (one entry per
+    candidate); the correlations are evaluated element-wise and floats are
+    returned for scalar input.
+    """
+    ID_t = geometry.ID_t
+    D_e = geometry.D_e
 
-        T_error = abs((Temp2 - T2_o)/Temp2)
-        t_error = abs((temp2 - t2_o)/temp2)
+    def side(warm_value, cool_value, shell):
+        if shell:
+            return np.where(warm_shell, warm_value, cool_value)
+        return np.where(warm_shell, cool_value, warm_value)
 
-        if T_error < 0.0005 and t_error < 0.0005:
-            t_loop = False
+    V_s = side(m_w, m_c, True) / (side(warm.rho, cool.rho, True) * geometry.A_s)
+    V_t = side(m_w, m_c, False) / (side(warm.rho, cool.rho, False) * geometry.A_t)
 
-    print(Temp2)
-    print(temp2)
+    # Reynolds Numbers
+    Re_s = V_s * D_e / side(warm.nu, cool.nu, True)
+    Re_t = V_t * ID_t / side(warm.nu, cool.nu, False)
 
-    ## Log Mean Temperature Diffference (Counter Flow)
+    # Nusselt Numbers (tube: laminar below Re = 2200; Pr exponent 0.4 heating, 0.3 cooling)
+    pr_t = side(warm.pr, cool.pr, False)
+    Nu_t = np.where(Re_t < 2200, (1.86 * ID_t * Re_t * pr_t / geometry.length)**(1/3),
+                    (0.023) * Re_t**(4/5) * pr_t ** np.where(warm_shell, 0.4, 0.3))
+    Nu_s = 0.36*Re_s**0.55 * side(warm.pr, cool.pr, True)**(1/3)
 
-    LogMeanTempDiff = ((Temp1 - temp2) - (Temp2 - temp1)) / np.log((Temp1-temp2)/(Temp2 - temp1));
+    # Convection Coefficients
+    h_i = Nu_t * side(warm.k, cool.k, False) / ID_t
+    h_o = Nu_s * side(warm.k, cool.k, True) / D_e
+    h_t = h_i * ID_t / geometry.OD_t
 
-    ## Heat Balance for Fluids
+    ## Exchanger Coefficients
+    U_o = (1/h_t + 1/h_o) ** -1  # Overall convection
 
-    q_w = h_cap_w * (Temp1 - Temp2);
-    q_c = h_cap_c * (temp2 - temp1);
+    flow = ShellTubeFlow(V_s, V_t, Re_s, Re_t, side(warm.rho, cool.rho, True), side(warm.rho, cool.rho, False), U_o)
+    if np.ndim(U_o) == 0:
+        return ShellTubeFlow(*(float(value) for value in flow))
+    return flow
 
-    ## Heat Balance for the Exchanger
 
-    F_factor = (R_factor**2 + 1)**0.5 * np.log((1-S_factor)/(1-R_factor*S_factor)) / ((R_factor - 1)* np.log((2 - S_factor*(R_factor + 1 - (R_factor**2 + 1)**0.5)) / (2 - S_factor *(R_factor + 1 + (R_factor**2 + 1)**0.5))))           # Correction Factor
+def shelltube_pressure_drops(geometry, flow, epsilon=STEEL_ROUGHNESS):
+    """Shell- and tube-side pressure drops (Pa); scalars or arrays."""
+    # f tubes: 64/Re or Colebrook-White, with the transition of the tube-side Nusselt correlation
+    f_t = friction_factor(flow.Re_t, epsilon / geometry.ID_t, laminar_re=2200)
+    f_s = np.exp(0.576 - 0.19 * np.log(flow.Re_s))        # f shell
 
-    q = U_o * A_o * F_factor * LogMeanTempDiff        # Heat transferred
+    deltaP_s = flow.rho_s * flow.V_s**2 * geometry.D_s * f_s * (geometry.N_b + 1) / (2 * geometry.D_e)   # pressure drop in shell
+    deltaP_t = flow.rho_t * flow.V_t**2 * (f_t * geometry.length / geometry.ID_t + 4) * geometry.N_p / 2     # pressure drop in tubes
+    if np.ndim(deltaP_s) == 0:
+        return float(deltaP_s), float(deltaP_t)
+    return deltaP_s, deltaP_t
+
+
+@solver_scope
+def calculate_shelltube(
+        length, shell_id, tube_od, tube_bwg,
+        arrangement, tube_pitch, passes, baffles,
+        warm_fluid, warm_fluid_inlet_temp, warm_fluid_mass_flow,
+        cool_fluid, cool_fluid_inlet_temp, cool_fluid_mass_flow, backend=None,
+        tolerance=DEFAULT_TOLERANCE_K, max_iterations=DEFAULT_MAX_ITERATIONS,
+        initial_state=None, return_state=False, driver=None):
+    """Clean and one-year-fouled coefficients, duties and outlets of a shell-and-tube exchanger.
+
+    The outlet temperatures are iterated by driver (an IterationDriver, by
+    default one built from tolerance and max_iterations) until they change
+    by less than its tolerance (K); ConvergenceError is raised after
+    max_iterations. The iteration starts from initial_state (an OutletState)
+    when given, else from the midpoint of the inlets. With return_state=True
+    the converged OutletState is returned after the results dict.
+    """
+    ## Givens
 
-    ## Fouling Factors and Design Coefficient
+    # mass flow rates
+    m_w = float(warm_fluid_mass_flow)     # mass flow rate of warmer fluid
+    m_c = float(cool_fluid_mass_flow)       # mass flow rate of cooler fluid
 
-    U_old = (1/U_o + R_di + R_do) ** -1  # heat transfer coefficient after 1 year
+    # inlet temps
+    Temp1 =  float(warm_fluid_inlet_temp)               # inlet temp of warmer fluid
+    temp1 =  float(cool_fluid_inlet_temp)                # inlet temp of cooler fluid
 
-    q_old = q * U_old / U_o             # q afer 1 year
+    geometry = shelltube_geometry(length, shell_id, tube_od, tube_bwg, arrangement, tube_pitch, passes, baffles)
+    A_o = geometry.A_o
+    effectiveness = shell_effectiveness(geometry.N_p)
 
-    # Recalculate Outlet Temperature Calculations
+    # Fouling resistances evaluated together: clean, then after 1 year
+    R_fouling = np.array([0.0, R_DI + R_DO])
 
-    R_factor = h_cap_c/h_cap_w;        # ratio of heat cap, cool / warm
+    ## (Route higher mass flow rate through larger flow area)
+    warm_shell = warm_in_shell(geometry, m_w, m_c)
 
-    A_o = N_t * np.pi * OD_t * Length;      # surface area of heat transfer
+    # Values from the latest evaluation, used after convergence
+    evaluation = {}
 
-    # Calculations for C1, C2, C3, and S
+    def outlet_temps(outlets):
+        """Clean outlet temperatures (°C) implied by properties at the mean temperatures."""
+        Temp2, temp2 = outlets
+        Tavg = (Temp1 + Temp2) * .5 + 273.15      # Tavg based on Temp1 and Temp2
+        tavg = (temp1 + temp2) * .5 + 273.15     # tavg based on temp1 and temp2
 
-    Const1 = np.exp(U_old * A_o / h_cap_c * (R_factor**2 + 1)**0.5);
-    Const2 = (R_factor + 1 - (R_factor**2 + 1)**0.5);
-    Const3 = (R_factor + 1 + (R_factor**2 + 1)**0.5);
+        warm = fluid_props(warm_fluid, Tavg, pressure_pa, backend)    # Properties at Tavg
+        cool = fluid_props(cool_fluid, tavg, pressure_pa, backend)    # Properties at tavg
+        cp_w = warm.cp
+        cp_c = cool.cp
 
-    S_factor = 2*(1 - Const1) / (Const2 - Const1*Const3);
+        flow = shelltube_flow(geometry, warm_shell, m_w, m_c, warm, cool)
+        U_o = flow.U_o
 
-    asdfjd = U_old * A_o / h_cap_c;
+        ## Capacitances
+        h_cap_w = m_w * cp_w     # heat capacitance warm
+        h_cap_c = m_c * cp_c     # heat capacitance cool
 
-    t2_old = S_factor*(Temp1-temp1) + temp1
-    T2_old = Temp1 - R_factor*(temp2-temp1)
+        R_factor = h_cap_c/h_cap_w        # ratio of heat cap, cool / warm
+        S_factor = effectiveness(U_o, A_o, h_cap_c, R_factor)
 
-    ## Area Required to Transfer Heat (Determination of Plate Area)
+        evaluation.update(flow=flow, h_cap_c=h_cap_c, R_factor=R_factor)
 
-    A_old = q / (U_old * F_factor * LogMeanTempDiff);   # area required after 1 y
-    L_old = A_old / (N_t * np.pi * OD_t);  # L required after 1 y
+        temp2_new = S_factor*(Temp1-temp1) + temp1
+        Temp2_new = Temp1 - R_factor*(temp2_new-temp1)
+        return (Temp2_new, temp2_new)
 
-    ## Friction Factors
+    if driver is None:
+        driver = IterationDriver(tolerance, max_iterations)
 
-    if Re_t < 2200:      # laminar condition
-        f_t = 64 / Re_t;        # f tubes
+    # Fixed-point iteration on the outlet temperatures (°C),
+    # starting from the midpoint of the inlets unless warm-started
+    if initial_state is None:
+        T_mid = (Temp1 + temp1) * .5
+        start = (T_mid, T_mid)
     else:
-        f_t = 0.25 / (np.log10(epsilon/(3.7*ID_t) - 5.74/Re_t**0.9))**2;      # f tubes
+        start = (initial_state.warm_outlet - 273.15, initial_state.cool_outlet - 273.15)
+    solution = driver.solve(outlet_temps, start)
+    Temp2, temp2 = solution.x
 
-    f_s = np.exp(0.576 - 0.19 * np.log(Re_s));        # f shell
+    flow = evaluation["flow"]
+    U_o = flow.U_o
+    h_cap_c = evaluation["h_cap_c"]
+    R_factor = evaluation["R_factor"]
 
-    ## Pressure Drop Calculations
+    ## Clean and Fouled Performance (one P-NTU evaluation over all fouling resistances)
 
-    if m_w_greater == A_s_greater:
-        deltaP_s = rho_w * V_s**2 * D_s * f_s * (N_b + 1) / (2 * D_e)   # pressure drop in shell
-        deltaP_t = rho_c * V_t**2 * (f_t * Length / ID_t + 4)  * N_p / 2     # pressure drop in tubes
+    U_fouled = (1/U_o + R_fouling) ** -1
+    S_fouled = effectiveness(U_fouled, A_o, h_cap_c, R_factor)
+    t2_fouled = S_fouled*(Temp1-temp1) + temp1
+    T2_fouled = Temp1 - R_factor*(t2_fouled-temp1)
+    q_fouled = S_fouled * h_cap_c * (Temp1 - temp1)     # Heat transferred
 
-    else:
-        deltaP_s = rho_c * V_s**2 * D_s * f_s * (N_b + 1) / (2 * D_e)   # pressure drop in shell
-        deltaP_t = rho_w * V_t**2 * (f_t * Length / ID_t + 4)  * N_p / 2     # pressure drop in tubes
+    ## Pressure Drop Calculations
 
-    #return(f"{U_o:.2f},   {U_old:.2f}]")
+    deltaP_s, deltaP_t = shelltube_pressure_drops(geometry, flow)
+    if warm_shell:
+        deltaP_w, deltaP_c = deltaP_s / 1000, deltaP_t / 1000
+    else:
+        deltaP_w, deltaP_c = deltaP_t / 1000, deltaP_s / 1000
 
     results = {
         "New Exchanger Coefficient": f"{U_o:.2f}",
-        "1 y/o Exchanger Coefficient": f"{U_old:.2f}",
+        "1 y/o Exchanger Coefficient": f"{U_fouled[1]:.2f}",
+        "New Heat Transfer Rate": f"{q_fouled[0] / 1000:.2f} kW",
+        "1 y/o Heat Transfer Rate": f"{q_fouled[1] / 1000:.2f} kW",
+        "New Warm Fluid Outlet Temperature": f"{T2_fouled[0]:.2f} °C",
+        "New Cool Fluid Outlet Temperature": f"{t2_fouled[0]:.2f} °C",
+        "1 y/o Warm Fluid Outlet Temperature": f"{T2_fouled[1]:.2f} °C",
+        "1 y/o Cool Fluid Outlet Temperature": f"{t2_fouled[1]:.2f} °C",
+        "Warm Fluid Pressure Drop": f"{deltaP_w:.2f} kPa",
+        "Cool Fluid Pressure Drop": f"{deltaP_c:.2f} kPa",
+        "Iterations": f"{solution.iterations}",
+        "Residual": f"{solution.residual:.2e} K",
     }
-
-    return results
\ No newline at end of file
+    if return_state:
+        return results, OutletState(float(Temp2) + 273.15, float(temp2) + 273.15)
+
+    return results
+
+
+class ShellTubeCandidate(NamedTuple):
+    """One catalog configuration from size_shelltube, with catalog sizes in inches."""
+    tube_od: float              # Tube OD, in
+    bwg: int                    # Tube gauge
+    pitch: float                # Tube pitch, in
+    layout: str                 # "square" or "triangular"
+    shell_id: float             # Shell inside diameter, in
+    passes: int                 # Tube passes
+    baffles: int                # Number of baffles
+    tubes: int                  # Number of tubes
+    area: float                 # Outer heat transfer area, m^2
+    U: float                    # Overall coefficient after one year of fouling, W/m^2-K
+    duty: float                 # Heat transfer rate after one year of fouling, W
+    warm_pressure_drop: float   # kPa
+    cool_pressure_drop: float   # kPa
+
+
+class ShellTubeSizing(NamedTuple):
+    candidates: list    # Ranked ShellTubeCandidate entries
+    evaluated: int      # Configurations enumerated from the catalog
+    feasible: int       # Configurations meeting the duty and pressure drops
+
+
+def catalog_layouts(length, baffles=SIZING_BAFFLES):
+    """Every catalog (tube, shell, passes, baffles) configuration as one array geometry.
+
+    Returns (keys, geometry): keys holds the catalog sizes (inches) of each
+    configuration and geometry is a ShellTubeGeometry of arrays. Baffle
+    counts whose spacing falls outside MIN/MAX_BAFFLE_SPACING times the
+    shell ID are left out.
+    """
+    catalog = get_catalog()
+    rows = []
+    for (od_in, pitch_in, layout, shell_in), shell in catalog.shells.items():
+        for (tube_od_in, bwg), tube in catalog.tubes.items():
+            if tube_od_in != od_in:
+                continue
+            for passes, count in shell.tube_counts.items():
+                rows.append((od_in, bwg, pitch_in, layout, shell_in, passes, count,
+                             tube.od, tube.id, shell.shell_id, shell.pitch))
+    if not rows:
+        raise ValueError("The catalog lists no shell-and-tube layouts")
+
+    columns = list(zip(*rows))
+    N_b = np.asarray(list(baffles), dtype=float)
+    n_rows, n_baffles = len(rows), len(N_b)
+
+    # Every row with every baffle count, pruned by baffle spacing
+    row = np.repeat(np.arange(n_rows), n_baffles)
+    N_b = np.tile(N_b, n_rows)
+    D_s = np.asarray(columns[9])[row]
+    spacing = float(length) / (N_b + 1)
+    keep = (spacing >= MIN_BAFFLE_SPACING * D_s) & (spacing <= MAX_BAFFLE_SPACING * D_s)
+    row, N_b, D_s = row[keep], N_b[keep], D_s[keep]
+
+    keys = {name: np.asarray(values)[row] for name, values in
+            zip(("tube_od", "bwg", "pitch", "layout", "shell_id", "passes", "tubes"), columns[:7])}
+    keys["baffles"] = N_b.astype(int)
+    geometry = layout_geometry(float(length), np.asarray(columns[7])[row], np.asarray(columns[8])[row],
+                               keys["tubes"], keys["passes"], D_s, N_b, np.asarray(columns[10])[row],
+                               keys["layout"])
+    return keys, geometry
+
+
+def _take(record, mask):
+    # Subset every array field of a NamedTuple, leaving scalars alone
+    return type(record)(*(value[mask] if np.ndim(value) else value for value in record))
+
+
+def _dominated(front, rows):
+    # Rows of rows dominated by some row of front (all columns minimized)
+    no_worse = np.all(front[None, :, :] <= rows[:, None, :], axis=2)
+    better = np.any(front[None, :, :] < rows[:, None, :], axis=2)
+    return np.any(no_worse & better, axis=1)
+
+
+def _pareto(objectives, block=1024):
+    """Indices of rows not dominated in every column (all minimized), in input order.
+
+    Rows should be sorted by the first column so that each block is mostly
+    screened by one array comparison against the front found so far.
+    """
+    kept = []
+    for start in range(0, len(objectives), block):
+        rows = np.arange(start, min(start + block, len(objectives)))
+        if kept:
+            rows = rows[~_dominated(objectives[kept], objectives[rows])]
+        for i in rows:
+            if not kept or not _dominated(objectives[kept], objectives[i:i + 1])[0]:
+                kept.append(i)
+    return np.asarray(kept, dtype=int)
+
+
+@solver_scope
+def size_shelltube(duty, max_warm_pressure_drop, max_cool_pressure_drop, length,
+                   warm_fluid, warm_fluid_inlet_temp, warm_fluid_mass_flow,
+                   cool_fluid, cool_fluid_inlet_temp, cool_fluid_mass_flow,
+                   baffles=SIZING_BAFFLES, limit=20, backend=None,
+                   tolerance=DEFAULT_TOLERANCE_K, max_iterations=DEFAULT_MAX_ITERATIONS):
+    """Rank the catalog configurations that deliver duty (W) within the allowed pressure drops (kPa).
+
+    The duty fixes both outlet temperatures, so properties are evaluated once
+    at the resulting mean temperatures and every configuration of
+    catalog_layouts() is rated in one array pass: pressure drops first,
+    then the one-year-fouled duty of the survivors. Feasible configurations
+    dominated in (area, warm pressure drop, cool pressure drop) are dropped
+    and the rest are ranked by area, then total pressure drop; the first
+    limit are returned.
+    """
+    Q = float(duty)
+    m_w = float(warm_fluid_mass_flow)
+    m_c = float(cool_fluid_mass_flow)
+    Temp1 = float(warm_fluid_inlet_temp)
+    temp1 = float(cool_fluid_inlet_temp)
+    if Q <= 0:
+        raise ValueError(f"Duty must be positive, got {duty}")
+    if Temp1 <= temp1:
+        raise ValueError("Warm fluid inlet temperature must exceed the cool fluid inlet temperature")
+
+    # Counterflow limit with cp at the midpoint of the inlets
+    T_mid = (Temp1 + temp1) * .5
+    C_min = min(m_w * fluid_props(warm_fluid, T_mid + 273.15, pressure_pa, backend).cp,
+                m_c * fluid_props(cool_fluid, T_mid + 273.15, pressure_pa, backend).cp)
+    if Q >= C_min * (Temp1 - temp1):
+        raise ValueError(f"Duty of {Q:.0f} W exceeds the maximum possible {C_min * (Temp1 - temp1):.0f} W")
+
+    # Outlet temperatures (°C) fixed by the duty, with cp at the mean temperatures
+    evaluation = {}
+
+    def outlet_temps(outlets):
+        Temp2, temp2 = outlets
+        warm = fluid_props(warm_fluid, (Temp1 + Temp2) * .5 + 273.15, pressure_pa, backend)
+        cool = fluid_props(cool_fluid, (temp1 + temp2) * .5 + 273.15, pressure_pa, backend)
+        evaluation.update(warm=warm, cool=cool)
+        return (Temp1 - Q / (m_w * warm.cp), temp1 + Q / (m_c * cool.cp))
+
+    Temp2, temp2 = IterationDriver(tolerance, max_iterations).solve(outlet_temps, (T_mid, T_mid)).x
+    if Temp2 <= temp1 or temp2 >= Temp1:
+        raise ValueError(f"Duty of {Q:.0f} W would cross the inlet temperatures")
+    warm = evaluation["warm"]
+    cool = evaluation["cool"]
+
+    keys, geometry = catalog_layouts(length, baffles)
+    evaluated = len(geometry.A_o)
+
+    # Hydraulics first: drop configurations over either allowable pressure drop
+    warm_shell = warm_in_shell(geometry, m_w, m_c)
+    flow = shelltube_flow(geometry, warm_shell, m_w, m_c, warm, cool)
+    deltaP_s, deltaP_t = shelltube_pressure_drops(geometry, flow)
+    dP_w = np.where(warm_shell, deltaP_s, deltaP_t) / 1000
+    dP_c = np.where(warm_shell, deltaP_t, deltaP_s) / 1000
+    keep = (dP_w <= float(max_warm_pressure_drop)) & (dP_c <= float(max_cool_pressure_drop))
+    keys = {name: values[keep] for name, values in keys.items()}
+    geometry, flow, dP_w, dP_c = _take(geometry, keep), _take(flow, keep), dP_w[keep], dP_c[keep]
+
+    # Duty after one year of fouling (1-2 exchanger effectiveness; counterflow for one tube pass)
+    h_cap_c = m_c * cool.cp
+    R_factor = h_cap_c / (m_w * warm.cp)
+    U_fouled = (1/flow.U_o + R_DI + R_DO) ** -1
+    with np.errstate(over="ignore", invalid="ignore"):
+        S_factor = one_two_shell_effectiveness(U_fouled, geometry.A_o, h_cap_c, R_factor)
+    S_factor = np.where(np.isfinite(S_factor), S_factor, 2 / (R_factor + 1 + (R_factor**2 + 1)**0.5))
+    S_factor = np.where(geometry.N_p == 1,
+                        counterflow_effectiveness(U_fouled, geometry.A_o, h_cap_c, R_factor), S_factor)
+    q = S_factor * h_cap_c * (Temp1 - temp1)
+    keep = q >= Q
+    feasible = int(np.count_nonzero(keep))
+
+    keys = {name: values[keep] for name, values in keys.items()}
+    area, U_fouled, q, dP_w, dP_c = geometry.A_o[keep], U_fouled[keep], q[keep], dP_w[keep], dP_c[keep]
+
+    # Rank by area, then total pressure drop, and drop dominated configurations
+    order = np.lexsort((dP_w + dP_c, area))
+    order = order[_pareto(np.column_stack((area, dP_w, dP_c))[order])][:int(limit)]
+
+    candidates = [ShellTubeCandidate(float(keys["tube_od"][i]), int(keys["bwg"][i]), float(keys["pitch"][i]),
+                                     str(keys["layout"][i]), float(keys["shell_id"][i]), int(keys["passes"][i]),
+                                     int(keys["baffles"][i]), int(keys["tubes"][i]), float(area[i]),
+                                     float(U_fouled[i]), float(q[i]), float(dP_w[i]), float(dP_c[i]))
+                  for i in order]
+    return ShellTubeSizing(candidates, evaluated, feasible)
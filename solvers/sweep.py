@@ -0,0 +1,98 @@
+"""
+Parametric sweeps with continuation.
+
+Neighbouring points of a dense sweep have nearly the same outlet
+temperatures. sweep() warm-starts each point from the converged OutletState
+of the previous ones: after two points the next state is extrapolated along
+the secant through the last two solutions (a first-order predictor), so
+every solve starts close to its answer and needs fewer iterations (and
+property evaluations) than a cold start from the inlet midpoint. The
+prediction is clamped to the range of the inlet temperatures (the
+*_inlet_temp keyword arguments, °C) so a long secant step cannot start a
+solve outside the physical range. It works with any solver that accepts
+initial_state and return_state (calculate_dphx, calculate_plateframe and
+calculate_shelltube).
+
+    from solvers.dphx_solver import calculate_dphx
+    from solvers.sweep import sweep
+
+    results = sweep(calculate_dphx, "fluid1_mass_flow", np.linspace(0.2, 1.0, 41), **case)
+"""
+
+from typing import NamedTuple
+from solvers.convergence import ConvergenceError, OutletState
+
+
+class SweepResult(NamedTuple):
+    values: list        # Swept parameter values, in order
+    results: list       # Solver results dict for each value
+    states: list        # Converged OutletState for each value
+    iterations: int     # Total fixed-point iterations over the sweep
+
+
+def _inlet_bounds(kwargs):
+    """Lowest and highest inlet temperature (K) among the *_inlet_temp arguments, or None."""
+    try:
+        inlets = [float(value) + 273.15 for name, value in kwargs.items() if name.endswith("_inlet_temp")]
+    except (TypeError, ValueError):
+        return None
+    return (min(inlets), max(inlets)) if len(inlets) >= 2 else None
+
+
+def _predict(values, states, value, bounds=None):
+    """Secant extrapolation of the next state from the last two converged points.
+
+    With bounds (low, high) in K both outlets are clamped to that range.
+    """
+    if len(states) < 2:
+        return states[-1] if states else None
+    try:
+        v0, v1, v = float(values[-2]), float(values[-1]), float(value)
+    except (TypeError, ValueError):
+        return states[-1]       # not a numeric sweep axis
+    if v1 == v0:
+        return states[-1]
+    step = (v - v1) / (v1 - v0)
+    (T0, t0), (T1, t1) = states[-2], states[-1]
+    state = OutletState(T1 + step * (T1 - T0), t1 + step * (t1 - t0))
+    if bounds is not None:
+        low, high = bounds
+        state = OutletState(*(min(max(T, low), high) for T in state))
+    return state
+
+
+def sweep(solver, parameter, values, continuation=True, **kwargs):
+    """Call solver once per value of the keyword argument parameter.
+
+    The remaining keyword arguments are passed to every call. With
+    continuation=True each solve is warm-started from a state predicted from
+    the previous converged points. If a warm-started solve raises ValueError
+    (including ConvergenceError) the point is retried from the solver's
+    default starting guess before the error is raised.
+    """
+    if parameter in ("initial_state", "return_state"):
+        raise ValueError(f"Cannot sweep over '{parameter}'")
+
+    values = list(values)
+    results = []
+    states = []
+    iterations = 0
+    for index, value in enumerate(values):
+        kwargs[parameter] = value
+        state = _predict(values[:index], states, value, _inlet_bounds(kwargs)) if continuation else None
+        try:
+            result, converged = solver(initial_state=state, return_state=True, **kwargs)
+        except ValueError as error:
+            # Property lookups at a poor starting state raise plain ValueError
+            if state is None:
+                raise
+            if isinstance(error, ConvergenceError):
+                # The failed warm start still cost iterations; count them
+                iterations += error.iterations
+            result, converged = solver(return_state=True, **kwargs)
+
+        results.append(result)
+        states.append(converged)
+        iterations += int(result["Iterations"])
+
+    return SweepResult(values, results, states, iterations)
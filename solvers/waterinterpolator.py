@@ -1,74 +1,63 @@
 import numpy as np
+from bisect import bisect_right
+from solvers.catalog import get_catalog
 
-def WaterInterp(temp_w):
-    ## Set up properties table to pull from
-    variables = ["Tsat", "Psat", "vf", "vg", "uf", "ug", "hf", "hfg", "hg", "sf", "sg", "gamma", "rho", "mu", "nu", "sigma", "E", "Pr", "alpha", "k", "cp"]
-    
-    w_table = np.array([[0.,     0.611,  0.0010002, 206.136, 0.00,   2375.3, 0.01,   2501.3, 2501.4, 0.0000, 9.1562, 9.805, 999.8, 1.78E-03, 1.79E-06, 0.0765, 1.98E+09, 12.99, 1.35E-07, 0.569, 4.22E+00],
-                        [5.,     0.872,  0.0010001, 147.120, 20.97,  2382.3, 20.98,  2489.6, 2510.6, 0.0761, 9.0257, 9.807, 1000,  1.52E-03, 1.52E-06, 0.0749, 2.05E+09, 10.98, 1.38E-07, 0.579, 4.20E+00],
-                        [10.,    1.228,  0.0010004, 106.379, 42.00,  2389.2, 42.01,  2477.7, 2519.8, 0.1510, 8.9008, 9.804, 999.7, 1.31E-03, 1.31E-06, 0.0742, 2.10E+09, 9.35,  1.40E-07, 0.587, 4.19E+00],
-                        [15.,    1.705,  0.0010009, 77.926,  62.99,  2396.1, 62.99,  2465.9, 2528.9, 0.2245, 8.7814, 9.798, 991.2, 1.14E-03, 1.14E-06, 0.0735, 2.15E+09, 8.02,  1.42E-07, 0.595, 4.19E+00],
-                        [20.,    2.339,  0.0010018, 57.791,  83.95,  2402.9, 83.96,  2454.1, 2538.1, 0.2966, 8.6672, 9.789, 998.2, 1.00E-03, 1.00E-06, 0.0728, 2.17E+09, 6.97,  1.44E-07, 0.603, 4.18E+00],
-                        [25.,    3.169,  0.0010029, 43.360,  104.88, 2409.8, 104.89, 2442.3, 2547.2, 0.3674, 8.5580, 9.777, 997,   8.90E-04, 8.93E-07, 0.0720, 2.22E+09, 6.12,  1.46E-07, 0.61,  4.18E+00],
-                        [30.,    4.246,  0.0010043, 32.894,  125.78, 2416.6, 125.79, 2430.5, 2556.3, 0.4369, 8.4533, 9.764, 995.7, 7.98E-04, 8.00E-07, 0.0712, 2.25E+09, 5.43,  1.48E-07, 0.617, 4.18E+00],
-                        [40.,    7.384,  0.0010078, 19.523,  167.56, 2430.1, 167.57, 2406.7, 2574.3, 0.5725, 8.2570, 9.73,  992.2, 6.53E-04, 6.58E-07, 0.0696, 2.28E+09, 4.33,  1.52E-07, 0.632, 4.18E+00],
-                        [50.,    12.350, 0.0010121, 12.032,  209.32, 2443.5, 209.33, 2382.7, 2592.1, 0.7038, 8.0763, 9.689, 988,   5.47E-04, 5.53E-07, 0.0679, 2.29E+09, 3.55,  1.56E-07, 0.643, 4.18E+00],
-                        [60.,    19.940, 0.0010172, 7.671,   251.11, 2456.6, 251.13, 2358.5, 2609.6, 0.8312, 7.9096, 9.642, 983.2, 4.66E-04, 4.74E-07, 0.0662, 2.28E+09, 2.98,  1.59E-07, 0.654, 4.18E+00],
-                        [70.,    31.190, 0.0010228, 5.042,   292.95, 2469.6, 292.98, 2333.8, 2626.8, 0.9549, 7.7553, 9.589, 977.8, 4.04E-04, 4.13E-07, 0.0644, 2.25E+09, 2.53,  1.62E-07, 0.663, 4.19E+00],
-                        [80.,    47.390, 0.0010291, 3.407,   334.86, 2482.2, 334.91, 2308.8, 2643.7, 1.0753, 7.6122, 9.53,  971.8, 3.54E-04, 3.64E-07, 0.0626, 2.20E+09, 2.2,   1.64E-07, 0.67,  4.20E+00],
-                        [90.,    70.140, 0.0010360, 2.361,   376.85, 2494.5, 376.92, 2283.2, 2660.1, 1.1925, 7.4791, 9.466, 965.3, 3.15E-04, 3.26E-07, 0.0608, 2.14E+09, 1.95,  1.67E-07, 0.676, 4.21E+00],
-                        [100.,   101.40, 0.0010435, 1.673,   418.94, 2506.5, 419.04, 2257.0, 2676.1, 1.3069, 7.3549, 9.399, 958.4, 2.82E-04, 2.94E-07, 0.0589, 2.07E+09, 1.76,  1.68E-07, 0.68,  4.22E+00]])
-    
-    ## Find high end
-    i = 0
-    
-    while (w_table[i,0] <= temp_w):
-    
-        i = i + 1
-    
-    high_index = i
-    ## Low end
-    low_index = i - 1
-    
-    percent_high = (temp_w - w_table[low_index, 0])/ (w_table[high_index, 0] - w_table[low_index, 0])
-    percent_low = 1 - percent_high
-    
-    ## Take values from tables
-    
-    list_low = w_table[low_index, :]
-    list_high = w_table[high_index,:]
-    
-    ## Interpolate each variable
-    
-    list_interpolated = np.empty((1,len(list_low)), dtype = float)
-    list_interpolated[:] = list_low[:]*percent_low + list_high[:]*percent_high
-    
-    ## Assign Variable Names
+## Saturated water properties table (tables/waterproperties.csv), loaded once from the compiled catalog
+VARIABLES = get_catalog().water_columns
+W_TABLE = get_catalog().water_table
+COLUMN_INDEX = {name: i for i, name in enumerate(VARIABLES)}
+W_COLUMNS = np.ascontiguousarray(W_TABLE.T)    # one row per property
 
-    j = 0
+T_MIN = W_TABLE[0, 0]
+T_MAX = W_TABLE[-1, 0]
 
-    properties = {
-        "Tsat": list_interpolated[0, 0],
-        "Psat": list_interpolated[0, 1],
-        "vf": list_interpolated[0, 2],
-        "vg": list_interpolated[0, 3],
-        "uf": list_interpolated[0, 4],
-        "ug": list_interpolated[0, 5],
-        "hf": list_interpolated[0, 6],
-        "hfg": list_interpolated[0, 7],
-        "hg": list_interpolated[0, 8],
-        "sf": list_interpolated[0, 9],
-        "sg": list_interpolated[0, 10],
-        "gamma": list_interpolated[0, 11],
-        "rho": list_interpolated[0, 12],
-        "mu": list_interpolated[0, 13],
-        "nu": list_interpolated[0, 14],
-        "sigma": list_interpolated[0, 15],
-        "E": list_interpolated[0, 16],
-        "Pr": list_interpolated[0, 17],
-        "alpha": list_interpolated[0, 18],
-        "k": list_interpolated[0, 19],
-        "cp": list_interpolated[0, 20]
-    }
+# Plain Python copies for the scalar fast path
+_TEMPS = W_TABLE[:, 0].tolist()
+_ROWS = W_TABLE.tolist()
 
-    return properties
\ No newline at end of file
+def WaterInterp(temp_w, columns=None):
+    """Linearly interpolate saturated water properties at temp_w (°C).
+
+    temp_w may be a scalar or an array. Pass columns (e.g. ["rho", "mu", "k"])
+    to interpolate only the properties you need.
+    """
+    if columns is None:
+        columns = VARIABLES
+    try:
+        column_index = [COLUMN_INDEX[name] for name in columns]
+    except KeyError as e:
+        raise ValueError(f"Unknown water property {e}. Available: {', '.join(VARIABLES)}")
+
+    if isinstance(temp_w, (int, float)):
+        return _interp_scalar(float(temp_w), columns, column_index)
+
+    temps = np.asarray(temp_w, dtype=float)
+    if np.any(temps < T_MIN) or np.any(temps > T_MAX) or np.any(np.isnan(temps)):
+        raise ValueError(f"Water temperature {temp_w} °C is outside the table range ({T_MIN:g} to {T_MAX:g} °C)")
+
+    ## Find bracketing rows (high end clipped so T_MAX uses the last interval)
+    high_index = np.clip(np.searchsorted(W_COLUMNS[0], temps, side="right"), 1, len(W_TABLE) - 1)
+    low_index = high_index - 1
+
+    t_low = W_COLUMNS[0, low_index]
+    percent_high = (temps - t_low) / (W_COLUMNS[0, high_index] - t_low)
+
+    ## Interpolate only the requested columns
+    properties = {}
+    for name, i in zip(columns, column_index):
+        value_low = W_COLUMNS[i, low_index]
+        properties[name] = value_low + (W_COLUMNS[i, high_index] - value_low) * percent_high
+
+    return properties
+
+def _interp_scalar(temp_w, columns, column_index):
+    if not T_MIN <= temp_w <= T_MAX:
+        raise ValueError(f"Water temperature {temp_w} °C is outside the table range ({T_MIN:g} to {T_MAX:g} °C)")
+
+    high_index = min(bisect_right(_TEMPS, temp_w), len(_TEMPS) - 1)
+    list_low = _ROWS[high_index - 1]
+    list_high = _ROWS[high_index]
+    percent_high = (temp_w - list_low[0]) / (list_high[0] - list_low[0])
+
+    return {name: list_low[i] + (list_high[i] - list_low[i]) * percent_high
+            for name, i in zip(columns, column_index)}
@@ -0,0 +1,26 @@
+import pytest
+from solvers.catalog import pipe_dimensions, pipe_sizes
+
+
+@pytest.mark.parametrize("nominal", ["1 1/2", "1.5", "1.50", 1.5, "3/2"])
+def test_steel_pipe_accepts_numeric_and_fractional_sizes(nominal):
+    pipe = pipe_dimensions("Steel", nominal, "40 (std)")
+    assert pipe.nominal == "1 1/2"
+    assert pipe == pipe_dimensions("Steel", "1 1/2", "40 (std)")
+
+
+@pytest.mark.parametrize("nominal", ["3/4", "0.75", 0.75])
+def test_copper_tube_accepts_numeric_and_fractional_sizes(nominal):
+    tube = pipe_dimensions("Copper", nominal, ptype="Type L")
+    assert tube.nominal == "3/4"
+
+
+def test_unknown_pipe_size_raises():
+    with pytest.raises(ValueError):
+        pipe_dimensions("Steel", 1.6, "40 (std)")
+
+
+def test_pipe_sizes_round_trip_through_lookup():
+    sizes = pipe_sizes("Steel", schedule="40 (std)")
+    for nominal, inner in zip(sizes.nominal, sizes.id):
+        assert pipe_dimensions("Steel", nominal, "40 (std)").id == inner
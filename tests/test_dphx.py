@@ -0,0 +1,31 @@
+import pytest
+from solvers.dphx_solver import calculate_dphx, size_dphx_length
+
+CASE = dict(material="Steel", nominal_dia_inner="1", nominal_dia_outer="2",
+            fluid1="Water", fluid1_inlet_temp="80", fluid1_mass_flow="0.5",
+            fluid2="Water", fluid2_inlet_temp="20", fluid2_mass_flow="0.6",
+            schedule="40 (std)", ptype="Counterflow")
+LAMINAR = dict(CASE, fluid1_mass_flow="0.01", fluid2_mass_flow="0.01")
+
+
+def outlet(result, key="Cool Fluid Outlet Temp"):
+    return float(result[key].split()[0])
+
+
+def test_sized_length_reaches_target():
+    result = size_dphx_length(30, **CASE)
+    length = float(result["Required Length"].split()[0])
+    assert outlet(calculate_dphx(length=length, **CASE)) == pytest.approx(30, abs=0.01)
+
+
+def test_laminar_outlet_independent_of_length_raises_value_error():
+    reached = outlet(calculate_dphx(length="1", **LAMINAR))
+    for target in (reached + 1, reached - 1):
+        with pytest.raises(ValueError):
+            size_dphx_length(target, **LAMINAR)
+
+
+def test_target_outside_inlets_raises_value_error():
+    with pytest.raises(ValueError):
+        size_dphx_length(90, **CASE)
+
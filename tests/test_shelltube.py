@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from solvers.friction import friction_factor
+from solvers.properties import fluid_props
+from solvers.shelltube_solver import (ShellTubeFlow, catalog_layouts, counterflow_effectiveness,
+                                      one_two_shell_effectiveness, shelltube_pressure_drops, size_shelltube)
+
+
+@pytest.mark.parametrize("R_factor", [0.5, 1.0, 2.0])
+def test_counterflow_effectiveness(R_factor):
+    NTU = np.array([0.1, 1.0, 5.0])
+    if R_factor == 1.0:
+        expected = NTU / (1 + NTU)
+    else:
+        decay = np.exp(-NTU * (1 - R_factor))
+        expected = (1 - decay) / (1 - R_factor * decay)
+    assert counterflow_effectiveness(NTU, 1.0, 1.0, R_factor) == pytest.approx(expected)
+    assert np.all(counterflow_effectiveness(NTU, 1.0, 1.0, R_factor) > one_two_shell_effectiveness(NTU, 1.0, 1.0, R_factor))
+
+
+def test_counterflow_effectiveness_large_ntu_approaches_limit():
+    assert counterflow_effectiveness(1e4, 1.0, 1.0, 2.0) == pytest.approx(0.5)
+    assert counterflow_effectiveness(1e4, 1.0, 1.0, 0.5) == pytest.approx(1.0)
+
+
+def test_tube_friction_uses_shared_colebrook_kernel():
+    _, geometry = catalog_layouts(4)
+    geometry = geometry._replace(**{name: value[:3] for name, value in geometry._asdict().items()
+                                    if np.ndim(value)})
+    Re_t = np.array([1500.0, 2.0e4, 1.0e5])
+    flow = ShellTubeFlow(np.ones(3), np.ones(3), np.full(3, 1.0e4), Re_t, np.full(3, 1000.0),
+                         np.full(3, 1000.0), np.ones(3))
+    _, deltaP_t = shelltube_pressure_drops(geometry, flow, epsilon=4.6e-5)
+    f_t = friction_factor(Re_t, 4.6e-5 / geometry.ID_t, laminar_re=2200)
+    expected = 1000.0 * (f_t * geometry.length / geometry.ID_t + 4) * geometry.N_p / 2
+    assert deltaP_t == pytest.approx(expected)
+
+
+def test_single_pass_candidates_are_rated_as_counterflow():
+    Q, m_w, m_c = 300e3, 2.0, 3.0
+    sizing = size_shelltube(Q, 5, 5, 4, "Water", 80, m_w, "Water", 20, m_c)
+
+    # Capacitances at the mean temperatures fixed by the duty, as in the search
+    Temp2 = temp2 = 50.0
+    for _ in range(20):
+        cp_w = fluid_props("Water", (80 + Temp2) / 2 + 273.15, 101325).cp
+        cp_c = fluid_props("Water", (20 + temp2) / 2 + 273.15, 101325).cp
+        Temp2, temp2 = 80 - Q / (m_w * cp_w), 20 + Q / (m_c * cp_c)
+    h_cap_c = m_c * cp_c
+    R_factor = h_cap_c / (m_w * cp_w)
+
+    single = [c for c in sizing.candidates if c.passes == 1]
+    assert single
+    for c in single:
+        S = counterflow_effectiveness(c.U, c.area, h_cap_c, R_factor)
+        assert c.duty == pytest.approx(S * h_cap_c * 60, rel=1e-6)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from solvers.convergence import ConvergenceError, OutletState
+from solvers.dphx_solver import calculate_dphx
+from solvers.sweep import _predict, sweep
+
+CASE = dict(length="10", material="Steel", nominal_dia_inner="1", nominal_dia_outer="2",
+            fluid1="Water", fluid1_inlet_temp="80", fluid2="Water", fluid2_inlet_temp="20",
+            fluid2_mass_flow="0.6", schedule="40 (std)", ptype="Counterflow")
+
+
+def test_prediction_is_clamped_to_inlet_range():
+    states = [OutletState(340.0, 300.0), OutletState(320.0, 320.0)]
+    state = _predict([1.0, 2.0], states, 10.0, bounds=(293.15, 353.15))
+    assert state == OutletState(293.15, 353.15)
+
+
+def test_warm_start_value_error_falls_back_to_cold_start():
+    calls = []
+
+    def solver(x, initial_state=None, return_state=False):
+        calls.append(initial_state)
+        if initial_state is not None and x == 3:
+            raise ValueError("state outside the property range")
+        if initial_state is not None and x == 4:
+            raise ConvergenceError("no convergence", 7, 1.0, None)
+        return {"Iterations": "2"}, OutletState(float(x), float(x))
+
+    result = sweep(solver, "x", [1, 2, 3, 4])
+    assert [state.warm_outlet for state in result.states] == [1.0, 2.0, 3.0, 4.0]
+    assert result.iterations == 4 * 2 + 7
+    assert calls[-1] is None
+
+
+def test_cold_start_errors_are_raised():
+    def solver(x, initial_state=None, return_state=False):
+        raise ValueError("bad input")
+
+    with pytest.raises(ValueError):
+        sweep(solver, "x", [1, 2])
+
+
+def test_sweep_matches_cold_solves():
+    flows = np.linspace(0.2, 1.0, 5)
+    result = sweep(calculate_dphx, "fluid1_mass_flow", flows, **CASE)
+    for flow, state in zip(flows, result.states):
+        _, cold = calculate_dphx(fluid1_mass_flow=flow, return_state=True, **CASE)
+        assert state.warm_outlet == pytest.approx(cold.warm_outlet, abs=1e-2)
+        assert state.cool_outlet == pytest.approx(cold.cool_outlet, abs=1e-2)